@@ -0,0 +1,106 @@
+"""
+Charter & Stone - Graph Authentication (Shared)
+
+Single GraphAuthenticator used by the background agents (orchestrator.py,
+watchdog.py). Token cache and MSAL app come from token_cache_loader, so
+every agent in the process shares one cache and one MSAL app.
+"""
+
+import os
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+
+from token_cache_loader import (
+    find_cached_access_token, get_public_client_app, load_token_cache, save_token_cache
+)
+
+# Load environment variables
+load_dotenv()
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+AZURE_TENANT_ID = os.getenv("AZURE_TENANT_ID")
+AZURE_CLIENT_ID = os.getenv("AZURE_CLIENT_ID")
+SCOPES = ["Tasks.ReadWrite", "Group.Read.All", "User.Read"]
+
+TOKEN_CACHE_PATH = Path.home() / ".charterstone" / "token_cache.json"
+
+# In-process copy of the current access token, refreshed TOKEN_REFRESH_MARGIN
+# seconds before it expires so repeat calls skip MSAL entirely
+TOKEN_REFRESH_MARGIN = 60
+
+# =============================================================================
+# AUTHENTICATION
+# =============================================================================
+
+class GraphAuthenticator:
+    """Handles Microsoft Graph API authentication from the shared token cache."""
+
+    def __init__(self):
+        # Cache and MSAL app are loaded lazily on first get_access_token()
+        self._token_cache = None
+        self._token = None
+        self._token_exp = 0
+
+    @property
+    def _app(self):
+        return get_public_client_app(AZURE_CLIENT_ID, AZURE_TENANT_ID, TOKEN_CACHE_PATH)
+
+    def _load_token_cache(self):
+        self._token_cache = load_token_cache(TOKEN_CACHE_PATH)
+
+    def _save_token_cache(self):
+        save_token_cache(TOKEN_CACHE_PATH, self._token_cache)
+
+    def _use_token(self, token, expires_at):
+        self._token, self._token_exp = token, expires_at
+        return token
+
+    def get_access_token(self, allow_device_flow=False):
+        if self._token and time.time() < self._token_exp - TOKEN_REFRESH_MARGIN:
+            return self._token
+
+        self._load_token_cache()  # cheap stat(); only re-reads if the file changed
+        accounts = self._app.get_accounts()
+
+        # 1. Try Silent (Cache) - unexpired token first, then MSAL (may refresh)
+        if accounts:
+            cached = find_cached_access_token(self._token_cache, accounts[0], SCOPES)
+            if cached:
+                return self._use_token(*cached)
+            result = self._app.acquire_token_silent(scopes=SCOPES, account=accounts[0])
+            if result and "access_token" in result:
+                self._save_token_cache()  # atomic; no-op unless MSAL rotated tokens
+                return self._use_token(result["access_token"], time.time() + result.get("expires_in", 3600))
+
+        if not allow_device_flow:
+            print("❌ Auth Error: No cached token found. Run server.py or watchdog.py first.")
+            return None
+
+        # 2. Device Code Flow (Interactive)
+        # Note: Since server.py likely already logged you in, this rarely hits.
+        flow = self._app.initiate_device_flow(scopes=SCOPES)
+        if "user_code" not in flow:
+            print("❌ Failed to create device flow")
+            return None
+
+        print(f"\n⚠️ AUTH REQUIRED: {flow['message']}")
+        result = self._app.acquire_token_by_device_flow(flow)
+
+        if "access_token" in result:
+            self._save_token_cache()
+            return self._use_token(result["access_token"], time.time() + result.get("expires_in", 3600))
+        else:
+            print(f"❌ Auth Failed: {result.get('error_description')}")
+            return None
+
+_auth = GraphAuthenticator()
+
+def get_graph_headers(allow_device_flow=False):
+    token = _auth.get_access_token(allow_device_flow=allow_device_flow)
+    if token:
+        return {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+    return None
@@ -8,6 +8,7 @@ and cache the token needed by the MCP server.
 Run this once before starting the server.
 """
 
+import asyncio
 import json
 import os
 import sys
@@ -16,6 +17,8 @@ from dotenv import load_dotenv
 
 import msal
 
+from token_cache_loader import acquire_token_by_device_flow_async, load_token_cache, save_token_cache
+
 # Load environment variables
 load_dotenv()
 
@@ -29,19 +32,23 @@ SCOPES = ["Tasks.ReadWrite", "Group.Read.All", "User.Read"]
 TOKEN_CACHE_PATH = Path.home() / ".charterstone" / "token_cache.json"
 
 
-def setup_authentication():
+def _prepare_cache_dir():
+    """Make sure the token cache can be written before the user finishes signing in."""
+    TOKEN_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    if not os.access(TOKEN_CACHE_PATH.parent, os.W_OK):
+        print(f"⚠️  Token cache directory is not writable: {TOKEN_CACHE_PATH.parent}")
+
+
+async def setup_authentication():
     """Perform Device Code Flow authentication and save token cache."""
     print("\n" + "="*70)
     print("Charter & Stone Planner MCP - Authentication Setup")
     print("="*70 + "\n")
     
-    # Initialize token cache
-    token_cache = msal.SerializableTokenCache()
-    
     # Load existing cache if it exists
     if TOKEN_CACHE_PATH.exists():
         print(f"Loading existing token cache from {TOKEN_CACHE_PATH}")
-        token_cache.deserialize(TOKEN_CACHE_PATH.read_text())
+    token_cache = load_token_cache(TOKEN_CACHE_PATH)
     
     # Create MSAL app
     app = msal.PublicClientApplication(
@@ -87,8 +94,11 @@ def setup_authentication():
     print("(This typically takes 2-5 minutes)")
     print("="*70 + "\n")
     
-    # Wait for user to authenticate
-    result = app.acquire_token_by_device_flow(flow)
+    # Wait for user to authenticate (polling runs off-thread, alongside setup checks)
+    result, _ = await asyncio.gather(
+        acquire_token_by_device_flow_async(app, flow),
+        asyncio.to_thread(_prepare_cache_dir)
+    )
     
     if "access_token" not in result:
         error_desc = result.get('error_description', 'Unknown error')
@@ -96,8 +106,7 @@ def setup_authentication():
         return False
     
     # Save token cache to disk
-    TOKEN_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    TOKEN_CACHE_PATH.write_text(token_cache.serialize())
+    save_token_cache(TOKEN_CACHE_PATH, token_cache)
     
     print("✓ Authentication successful!")
     print(f"✓ Token cache saved to: {TOKEN_CACHE_PATH}\n")
@@ -106,5 +115,5 @@ def setup_authentication():
 
 
 if __name__ == "__main__":
-    success = setup_authentication()
+    success = asyncio.run(setup_authentication())
     sys.exit(0 if success else 1)
@@ -11,6 +11,8 @@ from pathlib import Path
 from dotenv import load_dotenv
 import msal
 
+from token_cache_loader import acquire_token_by_device_flow_async, load_token_cache, save_token_cache
+
 # Load environment variables
 load_dotenv()
 
@@ -39,13 +41,10 @@ print(f"\n✅ CLIENT_ID: {CLIENT_ID[:20]}...")
 print(f"✅ TENANT_ID: {TENANT_ID}")
 print(f"📁 Token cache: {TOKEN_CACHE_FILE}")
 
-# Create token cache
-token_cache = msal.SerializableTokenCache()
-
+# Load token cache
 if TOKEN_CACHE_FILE.exists():
     print(f"\n✅ Existing token cache found")
-    with open(TOKEN_CACHE_FILE, "r") as f:
-        token_cache.deserialize(f.read())
+token_cache = load_token_cache(TOKEN_CACHE_FILE)
 
 # Create MSAL app
 app = msal.PublicClientApplication(
@@ -91,8 +90,8 @@ print("\n" + flow["message"])
 print("\n" + "="*70)
 print("\nWaiting for authentication...")
 
-# Poll for token
-result = app.acquire_token_by_device_flow(flow)
+# Poll for token (off-thread, bounded by DEVICE_FLOW_TIMEOUT)
+result = asyncio.run(acquire_token_by_device_flow_async(app, flow))
 
 if "access_token" not in result:
     print("\n❌ Authentication failed!")
@@ -103,9 +102,7 @@ if "access_token" not in result:
 print("\n✅ Authentication successful!")
 print("💾 Saving token cache...")
 
-TOKEN_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
-with open(TOKEN_CACHE_FILE, "w") as f:
-    f.write(token_cache.serialize())
+save_token_cache(TOKEN_CACHE_FILE, token_cache)
 
 print(f"✅ Token cached at: {TOKEN_CACHE_FILE}")
 
@@ -0,0 +1,34 @@
+"""
+Charter & Stone - JSON helpers
+
+Uses orjson when it is installed (2-5x faster on large Graph / ProPublica
+payloads) and falls back to the stdlib json module otherwise.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+
+def loads(data):
+    """Parse JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumpb(obj) -> bytes:
+    """Serialize to compact JSON bytes (for HTTP request bodies)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def dumps(obj, indent: bool = False) -> str:
+    """Serialize to a JSON str (2-space indent if `indent`)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode()
+    return json.dumps(obj, indent=2 if indent else None)
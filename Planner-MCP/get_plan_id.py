@@ -1,9 +1,14 @@
 import os
-import msal
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pathlib import Path
 from dotenv import load_dotenv
 
+import fastjson
+from token_cache_loader import get_public_client_app, load_token_cache, save_token_cache
+
 # Load your existing credentials
 load_dotenv()
 
@@ -20,20 +25,15 @@ if not all([CLIENT_ID, TENANT_ID]):
 
 SCOPES = ["Tasks.ReadWrite", "Group.Read.All", "User.Read"]
 
+# Concurrent Graph lookups (per-group plans, per-plan buckets)
+MAX_WORKERS = 16
+
 def get_access_token():
     """Get access token using device code flow (same as server.py)."""
-    cache = msal.SerializableTokenCache()
-    
     # Load existing cache if available
-    if TOKEN_CACHE_PATH.exists():
-        cache.deserialize(open(TOKEN_CACHE_PATH, "r").read())
+    cache = load_token_cache(TOKEN_CACHE_PATH)
     
-    authority = f"https://login.microsoftonline.com/{TENANT_ID}"
-    app = msal.PublicClientApplication(
-        CLIENT_ID,
-        authority=authority,
-        token_cache=cache
-    )
+    app = get_public_client_app(CLIENT_ID, TENANT_ID, TOKEN_CACHE_PATH)
     
     # Try to get token from cache first
     accounts = app.get_accounts()
@@ -55,9 +55,7 @@ def get_access_token():
     
     if "access_token" in result:
         # Save token cache
-        TOKEN_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with open(TOKEN_CACHE_PATH, "w") as f:
-            f.write(cache.serialize())
+        save_token_cache(TOKEN_CACHE_PATH, cache)
         
         print("✅ Authentication successful!\n")
         return result["access_token"]
@@ -65,41 +63,65 @@ def get_access_token():
         print(f"❌ Authentication failed: {result.get('error_description', 'Unknown error')}")
         return None
 
+def _get_values(session, url):
+    """GET a Graph collection and return its 'value' list ([] on non-200)."""
+    res = session.get(url)
+    if res.status_code == 200:
+        return fastjson.loads(res.content).get('value', [])
+    return []
+
+def iter_groups(session):
+    """Yield every group (id, displayName only), following @odata.nextLink paging."""
+    url = "https://graph.microsoft.com/v1.0/groups?$select=id,displayName&$top=100"
+    while url:
+        response = session.get(url)
+        if response.status_code != 200:
+            print(f"Error listing groups: {response.status_code} - {response.text}")
+            return
+        data = fastjson.loads(response.content)
+        yield from data.get('value', [])
+        url = data.get('@odata.nextLink')
+
 def list_plans():
     token = get_access_token()
     if not token:
         print("❌ Failed to acquire token. Check your .env file.")
         return
 
-    headers = {"Authorization": f"Bearer {token}"}
+    # One keep-alive session for every lookup, pooled wide enough for the fan-out
+    session = requests.Session()
+    session.headers.update({"Authorization": f"Bearer {token}"})
+    session.mount("https://", HTTPAdapter(
+        pool_maxsize=MAX_WORKERS,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+    ))
     
     print("🔎 Scanning for Plans...")
-    response = requests.get("https://graph.microsoft.com/v1.0/groups", headers=headers)
-    
-    if response.status_code == 200:
-        groups = response.json().get('value', [])
-        for group in groups:
-            # Check for plans in this group
-            plan_res = requests.get(f"https://graph.microsoft.com/v1.0/groups/{group['id']}/planner/plans", headers=headers)
-            if plan_res.status_code == 200:
-                plans = plan_res.json().get('value', [])
-                for plan in plans:
-                    print(f"✅ FOUND PLAN: {plan['title']}")
-                    print(f"   ID: {plan['id']}")
-                    print(f"   Group: {group['displayName']}")
-                    
-                    # Fetch buckets for this plan
-                    bucket_res = requests.get(f"https://graph.microsoft.com/v1.0/planner/plans/{plan['id']}/buckets", headers=headers)
-                    if bucket_res.status_code == 200:
-                        buckets = bucket_res.json().get('value', [])
-                        if buckets:
-                            print(f"   Buckets:")
-                            for bucket in buckets:
-                                print(f"      - {bucket['name']}: {bucket['id']}")
-                    
-                    print("-" * 50)
-    else:
-        print(f"Error listing groups: {response.status_code} - {response.text}")
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        # Wave 1: plans for every group, submitted as each page of groups arrives
+        group_futures = [
+            (group, executor.submit(_get_values, session, f"https://graph.microsoft.com/v1.0/groups/{group['id']}/planner/plans?$select=id,title"))
+            for group in iter_groups(session)
+        ]
+        found = [(group, plan) for group, future in group_futures for plan in future.result()]
+        
+        # Wave 2: buckets for every plan found
+        buckets_per_plan = executor.map(
+            lambda gp: _get_values(session, f"https://graph.microsoft.com/v1.0/planner/plans/{gp[1]['id']}/buckets?$select=id,name"),
+            found
+        )
+        
+        for (group, plan), buckets in zip(found, buckets_per_plan):
+            print(f"✅ FOUND PLAN: {plan['title']}")
+            print(f"   ID: {plan['id']}")
+            print(f"   Group: {group['displayName']}")
+            
+            if buckets:
+                print(f"   Buckets:")
+                for bucket in buckets:
+                    print(f"      - {bucket['name']}: {bucket['id']}")
+            
+            print("-" * 50)
 
 if __name__ == "__main__":
     list_plans()
\ No newline at end of file
@@ -13,12 +13,30 @@ API Documentation: https://projects.propublica.org/nonprofits/api
 """
 
 import sys
-import json
+import time
+import logging
+import asyncio
+import importlib.util
+import hashlib
+import functools
+from itertools import compress
 import requests
-from typing import Optional, Dict, Any, List
-from dataclasses import dataclass
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+from dataclasses import dataclass, field
 from urllib.parse import quote
 
+import fastjson
+
+try:
+    import httpx  # Only needed for the async batch lookups
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
 
 # =============================================================================
 # CONFIGURATION
@@ -36,12 +54,68 @@ HEADERS = {
     "User-Agent": "Charter-Stone-990-Scraper/1.0 (Higher Education Research)"
 }
 
+# Pooled keep-alive session shared by every ProPublica call
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+))
+
+# Async batch lookups: one HTTP/2 connection (multiplexed) when h2 is installed
+ASYNC_AVAILABLE = httpx is not None
+ASYNC_HTTP2 = importlib.util.find_spec("h2") is not None
+ASYNC_MAX_CONNECTIONS = 10
+
+# On-disk response cache (990 filings change annually; 24h is plenty fresh)
+CACHE_DIR = Path.home() / ".charterstone" / "propublica_cache"
+CACHE_TTL = 86400  # seconds
+
 
 # =============================================================================
 # DATA STRUCTURES
 # =============================================================================
 
-@dataclass
+# Built once at import; Filing990Summary.__str__ fills it with format_map()
+_SUMMARY_TEMPLATE = """
+================================================================================
+IRS FORM 990 SUMMARY
+================================================================================
+Organization:   {name}
+EIN:            {ein}
+Location:       {city}, {state}
+Tax Year:       {tax_year}
+Form Type:      {form_type}
+NTEE Code:      {ntee}
+
+FINANCIALS
+--------------------------------------------------------------------------------
+Total Revenue:  {revenue}
+Total Expenses: {expenses}
+Net Income:     {net_income}
+Net Assets:     {net_assets}
+
+DOCUMENTATION
+--------------------------------------------------------------------------------
+PDF Filing:     {pdf_url}
+================================================================================
+"""
+
+
+@functools.lru_cache(maxsize=1024)
+def _format_ein(ein: str) -> str:
+    """'751154650' -> '75-1154650' (short/empty EINs are returned as-is)."""
+    return f"{ein[:2]}-{ein[2:]}" if len(ein) >= 3 else ein
+
+
+def _fmt_currency(val: Optional[int]) -> str:
+    if val is None:
+        return "N/A"
+    return f"${val:,.0f}"
+
+
+@dataclass(slots=True, frozen=True)
 class Filing990Summary:
     """Structured summary of a Form 990 filing."""
     organization_name: str
@@ -55,17 +129,23 @@ class Filing990Summary:
     city: Optional[str]
     state: Optional[str]
     ntee_code: Optional[str]  # National Taxonomy of Exempt Entities
+    net_income: Optional[int] = field(init=False, default=None, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Derived once; shared by to_dict() and __str__ (frozen, so set via object)
+        if self.total_revenue and self.total_expenses:
+            object.__setattr__(self, "net_income", self.total_revenue - self.total_expenses)
     
     def to_dict(self) -> Dict[str, Any]:
         return {
             "organization_name": self.organization_name,
             "ein": self.ein,
-            "ein_formatted": f"{self.ein[:2]}-{self.ein[2:]}" if len(self.ein) >= 3 else self.ein,
+            "ein_formatted": _format_ein(self.ein),
             "tax_year": self.tax_year,
             "total_revenue": self.total_revenue,
             "total_expenses": self.total_expenses,
             "net_assets": self.net_assets,
-            "net_income": (self.total_revenue - self.total_expenses) if self.total_revenue and self.total_expenses else None,
+            "net_income": self.net_income,
             "pdf_url": self.pdf_url,
             "form_type": self.form_type,
             "city": self.city,
@@ -75,44 +155,121 @@ class Filing990Summary:
     
     def __str__(self) -> str:
         """Human-readable summary."""
-        def fmt_currency(val: Optional[int]) -> str:
-            if val is None:
-                return "N/A"
-            return f"${val:,.0f}"
-        
-        net_income = None
-        if self.total_revenue and self.total_expenses:
-            net_income = self.total_revenue - self.total_expenses
-        
-        return f"""
-================================================================================
-IRS FORM 990 SUMMARY
-================================================================================
-Organization:   {self.organization_name}
-EIN:            {self.ein[:2]}-{self.ein[2:] if len(self.ein) >= 3 else self.ein}
-Location:       {self.city or 'Unknown'}, {self.state or 'Unknown'}
-Tax Year:       {self.tax_year}
-Form Type:      {self.form_type}
-NTEE Code:      {self.ntee_code or 'Not classified'}
+        return _SUMMARY_TEMPLATE.format_map({
+            "name": self.organization_name,
+            "ein": _format_ein(self.ein),
+            "city": self.city or 'Unknown',
+            "state": self.state or 'Unknown',
+            "tax_year": self.tax_year,
+            "form_type": self.form_type,
+            "ntee": self.ntee_code or 'Not classified',
+            "revenue": _fmt_currency(self.total_revenue),
+            "expenses": _fmt_currency(self.total_expenses),
+            "net_income": _fmt_currency(self.net_income),
+            "net_assets": _fmt_currency(self.net_assets),
+            "pdf_url": self.pdf_url or 'Not available'
+        })
 
-FINANCIALS
---------------------------------------------------------------------------------
-Total Revenue:  {fmt_currency(self.total_revenue)}
-Total Expenses: {fmt_currency(self.total_expenses)}
-Net Income:     {fmt_currency(net_income)}
-Net Assets:     {fmt_currency(self.net_assets)}
 
-DOCUMENTATION
---------------------------------------------------------------------------------
-PDF Filing:     {self.pdf_url or 'Not available'}
-================================================================================
-"""
+# =============================================================================
+# RESPONSE CACHE
+# =============================================================================
+
+def _cache_file(url: str, params: Optional[Dict[str, Any]]) -> Path:
+    key = repr((url, sorted((params or {}).items())))
+    return CACHE_DIR / f"{hashlib.sha1(key.encode()).hexdigest()}.json"
+
+
+def _read_cache(url: str, params: Optional[Dict[str, Any]]) -> Tuple[Path, Optional[Dict[str, Any]], bool]:
+    """Return (cache path, cached entry or None, whether the entry is still fresh)."""
+    path = _cache_file(url, params)
+    
+    if path.exists():
+        try:
+            entry = fastjson.loads(path.read_bytes())
+            if "payload" in entry:
+                return path, entry, time.time() - path.stat().st_mtime < CACHE_TTL
+        except (OSError, ValueError):
+            pass
+    
+    return path, None, False
+
+
+def _write_cache(path: Path, etag: Optional[str], payload: Any) -> None:
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        path.write_text(fastjson.dumps({"etag": etag, "payload": payload}), encoding="utf-8")
+    except OSError as e:
+        print(f"Cache write failed: {e}")
+
+
+def _revalidation_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    if entry and entry.get("etag"):
+        return {"If-None-Match": entry["etag"]}
+    return {}
+
+
+def cached_get_json(url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    GET a ProPublica endpoint through the on-disk cache.
+    
+    Fresh entries (younger than CACHE_TTL) are returned without any HTTP
+    request. Stale entries are revalidated with If-None-Match; a 304 just
+    refreshes the entry's mtime.
+    
+    Raises:
+        requests.exceptions.RequestException on HTTP/network errors
+    """
+    path, entry, fresh = _read_cache(url, params)
+    if fresh:
+        return entry["payload"]
+    
+    response = SESSION.get(url, params=params, headers=_revalidation_headers(entry), timeout=TIMEOUT)
+    
+    if response.status_code == 304 and entry:
+        path.touch()
+        return entry["payload"]
+    
+    response.raise_for_status()
+    payload = fastjson.loads(response.content)
+    _write_cache(path, response.headers.get("ETag"), payload)
+    return payload
+
+
+async def cached_get_json_async(client: "httpx.AsyncClient", url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Async twin of cached_get_json() (same on-disk cache).
+    
+    Raises:
+        httpx.HTTPError on HTTP/network errors
+    """
+    path, entry, fresh = _read_cache(url, params)
+    if fresh:
+        return entry["payload"]
+    
+    response = await client.get(url, params=params, headers=_revalidation_headers(entry))
+    
+    if response.status_code == 304 and entry:
+        path.touch()
+        return entry["payload"]
+    
+    response.raise_for_status()
+    payload = fastjson.loads(response.content)
+    _write_cache(path, response.headers.get("ETag"), payload)
+    return payload
 
 
 # =============================================================================
 # API FUNCTIONS
 # =============================================================================
 
+def _search_params(name: str, state: Optional[str]) -> Dict[str, str]:
+    params = {"q": name}
+    if state:
+        params["state[id]"] = state.upper()
+    return params
+
+
 def search_organization(name: str, state: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Search for organizations by name.
@@ -124,19 +281,8 @@ def search_organization(name: str, state: Optional[str] = None) -> List[Dict[str
     Returns:
         List of matching organization records
     """
-    params = {"q": name}
-    if state:
-        params["state[id]"] = state.upper()
-    
     try:
-        response = requests.get(
-            SEARCH_ENDPOINT,
-            params=params,
-            headers=HEADERS,
-            timeout=TIMEOUT
-        )
-        response.raise_for_status()
-        data = response.json()
+        data = cached_get_json(SEARCH_ENDPOINT, _search_params(name, state))
         
         return data.get("organizations", [])
     
@@ -145,10 +291,23 @@ def search_organization(name: str, state: Optional[str] = None) -> List[Dict[str
         return []
 
 
+@functools.lru_cache(maxsize=512)
+def _get_org_cached(ein_clean: str) -> Dict[str, Any]:
+    """In-process memo of organization lookups. Errors propagate and are not cached."""
+    return cached_get_json(f"{ORG_ENDPOINT}/{ein_clean}.json")
+
+
+def clear_cache() -> None:
+    """Drop in-process organization lookups (for long-running processes)."""
+    _get_org_cached.cache_clear()
+
+
 def get_organization_details(ein: str) -> Optional[Dict[str, Any]]:
     """
     Retrieve full organization data by EIN.
     
+    Repeat lookups for the same EIN within a process are served from memory.
+    
     Args:
         ein: Employer Identification Number (digits only)
     
@@ -158,15 +317,11 @@ def get_organization_details(ein: str) -> Optional[Dict[str, Any]]:
     # Strip any formatting from EIN
     ein_clean = ein.replace("-", "").replace(" ", "")
     
-    url = f"{ORG_ENDPOINT}/{ein_clean}.json"
-    
     try:
-        response = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
-        response.raise_for_status()
-        return response.json()
+        return _get_org_cached(ein_clean)
     
     except requests.exceptions.HTTPError as e:
-        if response.status_code == 404:
+        if e.response is not None and e.response.status_code == 404:
             print(f"Organization with EIN {ein} not found")
         else:
             print(f"API error: {e}")
@@ -192,15 +347,9 @@ def get_most_recent_filing(org_data: Dict[str, Any]) -> Optional[Dict[str, Any]]
     if not filings:
         # Fall back to filings without extracted data (PDF only)
         filings = org_data.get("filings_without_data", [])
-        if filings:
-            # Sort by tax period year descending
-            filings_sorted = sorted(filings, key=lambda x: x.get("tax_prd_yr", 0), reverse=True)
-            return filings_sorted[0] if filings_sorted else None
-        return None
     
-    # Sort by tax period year descending to get most recent
-    filings_sorted = sorted(filings, key=lambda x: x.get("tax_prd_yr", 0), reverse=True)
-    return filings_sorted[0] if filings_sorted else None
+    # Latest tax period year wins (single O(N) pass, no sorted copy)
+    return max(filings, key=lambda x: x.get("tax_prd_yr", 0), default=None)
 
 
 def build_summary(org_data: Dict[str, Any], filing: Dict[str, Any]) -> Filing990Summary:
@@ -265,14 +414,39 @@ def scrape_990(
         print("No organizations found matching that name.")
         return None
     
+    ein = _select_best_match(matches, return_all_matches)
+    
+    # Step 2: Get full organization details
+    print(f"Fetching 990 filings...")
+    org_data = get_organization_details(ein)
+    
+    if not org_data:
+        return None
+    
+    # Steps 3-4: Most recent filing -> summary
+    return _summarize(org_data)
+
+
+def _select_best_match(
+    matches: List[Dict[str, Any]],
+    return_all_matches: bool,
+    verbose: bool = True
+) -> str:
+    """
+    Pick the best search match (educational first) and return its EIN.
+    
+    With verbose=False (concurrent lookups) the match listing is skipped and
+    the choice is logged instead of printed.
+    """
     # Filter for likely educational institutions (NTEE codes starting with B)
-    # B = Education category in NTEE taxonomy
-    edu_matches = [m for m in matches if (m.get("ntee_code") or "").startswith("B")]
+    # B = Education category in NTEE taxonomy. Single pass over the codes.
+    edu_mask = [(m.get("ntee_code") or "")[:1] == "B" for m in matches]
+    edu_matches = list(compress(matches, edu_mask))
     
     # Prefer educational matches, fall back to all matches
     candidates = edu_matches if edu_matches else matches
     
-    if return_all_matches or len(candidates) > 1:
+    if verbose and (return_all_matches or len(candidates) > 1):
         print(f"\nFound {len(matches)} total matches ({len(edu_matches)} educational):\n")
         for i, org in enumerate(candidates[:10], 1):  # Show top 10
             print(f"  {i}. {org.get('name', 'Unknown')}")
@@ -284,26 +458,23 @@ def scrape_990(
     best_match = candidates[0]
     ein = str(best_match.get("ein", ""))
     
-    print(f"Best match: {best_match.get('name')} (EIN: {best_match.get('strein')})")
-    
-    # Step 2: Get full organization details
-    print(f"Fetching 990 filings...")
-    org_data = get_organization_details(ein)
-    
-    if not org_data:
-        return None
+    if verbose:
+        print(f"Best match: {best_match.get('name')} (EIN: {best_match.get('strein')})")
+    else:
+        logger.info("Best match: %s (EIN: %s)", best_match.get("name"), best_match.get("strein"))
     
-    # Step 3: Get most recent filing
+    return ein
+
+
+def _summarize(org_data: Dict[str, Any]) -> Optional[Filing990Summary]:
+    """Build the summary for an organization's most recent filing."""
     filing = get_most_recent_filing(org_data)
     
     if not filing:
         print("No Form 990 filings found for this organization.")
         return None
     
-    # Step 4: Build and return summary
-    summary = build_summary(org_data, filing)
-    
-    return summary
+    return build_summary(org_data, filing)
 
 
 def scrape_990_by_ein(ein: str) -> Optional[Filing990Summary]:
@@ -332,6 +503,97 @@ def scrape_990_by_ein(ein: str) -> Optional[Filing990Summary]:
     return build_summary(org_data, filing)
 
 
+# =============================================================================
+# ASYNC BATCH LOOKUPS
+# =============================================================================
+
+def open_async_client() -> "httpx.AsyncClient":
+    """Shared AsyncClient for batch lookups (HTTP/2 when h2 is installed)."""
+    if httpx is None:
+        raise RuntimeError("Async lookups require httpx: pip install 'httpx[http2]'")
+    return httpx.AsyncClient(
+        http2=ASYNC_HTTP2,
+        timeout=TIMEOUT,
+        headers=HEADERS,
+        limits=httpx.Limits(max_connections=ASYNC_MAX_CONNECTIONS)
+    )
+
+
+async def search_organization_async(
+    client: "httpx.AsyncClient",
+    name: str,
+    state: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Async search_organization()."""
+    try:
+        data = await cached_get_json_async(client, SEARCH_ENDPOINT, _search_params(name, state))
+        return data.get("organizations", [])
+    
+    except httpx.HTTPError as e:
+        logger.warning("Search API error: %s", e)
+        return []
+
+
+async def get_organization_details_async(client: "httpx.AsyncClient", ein: str) -> Optional[Dict[str, Any]]:
+    """Async get_organization_details()."""
+    ein_clean = ein.replace("-", "").replace(" ", "")
+    
+    try:
+        return await cached_get_json_async(client, f"{ORG_ENDPOINT}/{ein_clean}.json")
+    
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            logger.warning("Organization with EIN %s not found", ein)
+        else:
+            logger.warning("API error: %s", e)
+        return None
+    
+    except httpx.HTTPError as e:
+        logger.warning("Request failed: %s", e)
+        return None
+
+
+async def scrape_990_async(
+    client: "httpx.AsyncClient",
+    university_name: str,
+    state: Optional[str] = None,
+    return_all_matches: bool = False
+) -> Optional[Filing990Summary]:
+    """Async scrape_990(), for running many lookups over one client."""
+    logger.info("Searching for: %s", university_name)
+    
+    matches = await search_organization_async(client, university_name, state)
+    
+    if not matches:
+        logger.info("No organizations found matching %r", university_name)
+        return None
+    
+    ein = _select_best_match(matches, return_all_matches, verbose=False)
+    
+    logger.info("Fetching 990 filings for EIN %s", ein)
+    org_data = await get_organization_details_async(client, ein)
+    
+    if not org_data:
+        return None
+    
+    return _summarize(org_data)
+
+
+async def scrape_990_many(names: List[str], state: Optional[str] = None) -> List[Any]:
+    """
+    Look up many organizations concurrently.
+    
+    Returns:
+        One entry per name, in order: a Filing990Summary, None (not found), or
+        the exception raised for that name
+    """
+    async with open_async_client() as client:
+        return await asyncio.gather(
+            *(scrape_990_async(client, name, state) for name in names),
+            return_exceptions=True
+        )
+
+
 # =============================================================================
 # CLI INTERFACE
 # =============================================================================
@@ -362,7 +624,7 @@ def main():
         
         # Also output JSON for programmatic use
         print("\nJSON Output:")
-        print(json.dumps(result.to_dict(), indent=2))
+        print(fastjson.dumps(result.to_dict(), indent=True))
     else:
         print("\nCould not retrieve 990 data.")
         sys.exit(1)
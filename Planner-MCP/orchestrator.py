@@ -1,10 +1,12 @@
-import os
-import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import re
-import time
+import logging
+import logging.handlers
 import requests
-import msal
-from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 import sys
 import io
@@ -14,7 +16,9 @@ if sys.stdout.encoding != 'utf-8':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
 # Import your existing tool
-from irs_scraper import scrape_990
+from irs_scraper import scrape_990, scrape_990_many, clear_cache as clear_990_cache, ASYNC_AVAILABLE
+from auth import get_graph_headers
+import fastjson
 
 # Load environment variables
 load_dotenv()
@@ -23,58 +27,34 @@ load_dotenv()
 # CONFIGURATION
 # =============================================================================
 
-# 1. CREDENTIALS
-AZURE_TENANT_ID = os.getenv("AZURE_TENANT_ID")
-AZURE_CLIENT_ID = os.getenv("AZURE_CLIENT_ID")
-
-# 2. PLANNER CONFIG
+# 1. PLANNER CONFIG
+# (Credentials and token cache location live in auth.py)
 PLAN_ID = "y9DwHD-ObEGDHvjmhIFtW2UAAnJj" # Launch Operations
 SOURCE_BUCKET_ID = "_KJDX4pHKkuO7bxKv98R5WUAJVxe"   # Watchdog Inbox
 DEST_BUCKET_ID = "QDeSpyXMUUaBLf2cJIi84WUALZr_"   # Strategy & Intel
 
-# 3. STORAGE
-TOKEN_CACHE_PATH = Path.home() / ".charterstone" / "token_cache.json"
+# 2. GRAPH BATCHING ($batch accepts at most 20 requests per call)
+GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
+GRAPH_BATCH_URL = f"{GRAPH_BASE_URL}/$batch"
+BATCH_SIZE = 20
 
-# =============================================================================
-# AUTHENTICATION (Standardized)
-# =============================================================================
+# Per-request headers inside a $batch PATCH (If-Match is merged in per task)
+BATCH_PATCH_HEADERS = {"Content-Type": "application/json"}
 
-class GraphAuthenticator:
-    def __init__(self):
-        self._token_cache = msal.SerializableTokenCache()
-        self._load_token_cache()
-        self._app = msal.PublicClientApplication(
-            AZURE_CLIENT_ID,
-            authority=f"https://login.microsoftonline.com/{AZURE_TENANT_ID}",
-            token_cache=self._token_cache
-        )
-    
-    def _load_token_cache(self):
-        if TOKEN_CACHE_PATH.exists():
-            self._token_cache.deserialize(TOKEN_CACHE_PATH.read_text())
-            
-    def _save_token_cache(self):
-        TOKEN_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-        TOKEN_CACHE_PATH.write_text(self._token_cache.serialize())
-    
-    def get_access_token(self):
-        accounts = self._app.get_accounts()
-        scopes = ["Tasks.ReadWrite", "Group.Read.All", "User.Read"]
-        if accounts:
-            result = self._app.acquire_token_silent(scopes=scopes, account=accounts[0])
-            if result and "access_token" in result:
-                self._save_token_cache()
-                return result["access_token"]
-        print("❌ Auth Error: No cached token found. Run server.py or watchdog.py first.")
-        return None
-
-_auth = GraphAuthenticator()
-
-def get_graph_headers():
-    token = _auth.get_access_token()
-    if token:
-        return {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-    return None
+# 3. RESEARCH (concurrent scrape_990 calls when httpx isn't installed)
+RESEARCH_WORKERS = 8
+
+# 4. LOGGING (the scheduler daemon's root handlers pick these up; see __main__ for standalone)
+LOG_BUFFER_CAPACITY = 16  # records buffered before a flush when run standalone
+
+logger = logging.getLogger("orchestrator")
+
+# One keep-alive session for all Graph calls (idempotent requests retried on 429/5xx)
+_graph_session = requests.Session()
+_graph_session.mount("https://", HTTPAdapter(
+    pool_maxsize=20,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+))
 
 # =============================================================================
 # DATA CLEANING MAPS
@@ -97,109 +77,142 @@ ABBREVIATIONS = {
     "ASU": "Arizona State University"
 }
 
-# =============================================================================
-# AUTHENTICATION
-# =============================================================================
+# Lookups use the matched word upper-cased, so keep keys upper-case even if
+# mixed-case entries (e.g. "UConn") are added above
+ABBREVIATIONS = {k.upper(): v for k, v in ABBREVIATIONS.items()}
 
-class GraphAuthenticator:
-    def __init__(self):
-        self._token_cache = msal.SerializableTokenCache()
-        self._load_token_cache()
-        self._app = msal.PublicClientApplication(
-            AZURE_CLIENT_ID,
-            authority=f"https://login.microsoftonline.com/{AZURE_TENANT_ID}",
-            token_cache=self._token_cache
-        )
-    
-    def _load_token_cache(self):
-        if TOKEN_CACHE_PATH.exists():
-            self._token_cache.deserialize(TOKEN_CACHE_PATH.read_text())
-            
-    def _save_token_cache(self):
-        TOKEN_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-        TOKEN_CACHE_PATH.write_text(self._token_cache.serialize())
-    
-    def get_access_token(self):
-        accounts = self._app.get_accounts()
-        scopes = ["Tasks.ReadWrite", "Group.Read.All", "User.Read"]
-        if accounts:
-            result = self._app.acquire_token_silent(scopes=scopes, account=accounts[0])
-            if result and "access_token" in result:
-                self._save_token_cache()
-                return result["access_token"]
-        print("❌ Auth Error: No cached token found. Run server.py or watchdog.py first.")
-        return None
-
-_auth = GraphAuthenticator()
-
-def get_graph_headers():
-    token = _auth.get_access_token()
-    if token:
-        return {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-    return None
+# "[🔴 DISTRESS] " style tags added by the Watchdog
+_TAG_RE = re.compile(r"\[.*?\]\s*")
+
+# Leading abbreviation (the title's first word, ignoring trailing ':' / ',').
+# Longest keys first so e.g. "UT" can't shadow a longer key.
+_ABBR_RE = re.compile(
+    r"^(" + "|".join(map(re.escape, sorted(ABBREVIATIONS, key=len, reverse=True))) + r")[:,]*(?= |$)",
+    re.IGNORECASE
+)
 
 # =============================================================================
 # WORKFLOW LOGIC
 # =============================================================================
 
+@lru_cache(maxsize=512)  # Watchdog titles repeat across runs in a long-lived daemon
 def clean_org_name(task_title):
-    # Remove tags and cleanup
-    name = re.sub(r"\[.*?\]\s*", "", task_title)
+    # Remove tags and cleanup (single leading "[tag]" is the common case - no regex needed)
+    if "[" not in task_title:
+        name = task_title
+    elif task_title.startswith("[") and task_title.count("[") == 1 and "]" in task_title:
+        name = task_title[task_title.find("]") + 1:].lstrip()
+    else:
+        name = _TAG_RE.sub("", task_title)
     name = name.replace("...", "").strip()
     
     # Check abbreviations
-    first_word = name.split(" ")[0].upper().replace(":", "").replace(",", "")
-    if first_word in ABBREVIATIONS:
-        return ABBREVIATIONS[first_word]
+    match = _ABBR_RE.match(name)
+    if match:
+        return ABBREVIATIONS[match.group(1).upper()]
     
     return name
 
+def _research_one(org_name):
+    try:
+        return scrape_990(org_name)
+    except Exception as e:
+        return e
+
+def research_orgs(org_names):
+    """
+    Run the Deep Dive (scrape_990) for every name concurrently: on one async
+    client when httpx is available, otherwise on a thread pool sharing the
+    scraper's keep-alive session. Returns one Filing990Summary / None /
+    exception per name, in order.
+    """
+    if ASYNC_AVAILABLE:
+        return asyncio.run(scrape_990_many(org_names))
+    
+    with ThreadPoolExecutor(max_workers=RESEARCH_WORKERS) as executor:
+        return list(executor.map(_research_one, org_names))
+
+def graph_batch(headers, batch_requests):
+    """
+    Send Graph requests through POST /$batch, BATCH_SIZE per HTTP call.
+    
+    Returns:
+        Dict of request id -> {"status": int, "body": ...}. A batch call that
+        fails outright marks each of its requests with that call's status.
+    """
+    responses = {}
+    for start in range(0, len(batch_requests), BATCH_SIZE):
+        chunk = batch_requests[start:start + BATCH_SIZE]
+        try:
+            res = _graph_session.post(GRAPH_BATCH_URL, headers=headers, data=fastjson.dumpb({"requests": chunk}))
+            if res.status_code == 200:
+                for item in fastjson.loads(res.content).get('responses', []):
+                    responses[item['id']] = item
+                continue
+            failure = {"status": res.status_code, "body": res.text[:200]}
+        except requests.exceptions.RequestException as e:
+            failure = {"status": 0, "body": str(e)}
+        for req in chunk:
+            responses[req['id']] = failure
+    return responses
+
 def process_tasks():
+    # The scheduler keeps this process alive indefinitely; start each run from the
+    # on-disk 990 cache (24h TTL) rather than lookups memoized on an earlier run
+    clear_990_cache()
+
     headers = get_graph_headers()
     if not headers: return
 
-    print("🌉 Orchestrator: Checking the Bridge...")
+    logger.info("🌉 Orchestrator: Checking the Bridge...")
     
     # 0. Get My ID (For Assignment)
     try:
-        me_res = requests.get("https://graph.microsoft.com/v1.0/me", headers=headers)
-        my_id = me_res.json().get('id')
+        me_res = _graph_session.get(f"{GRAPH_BASE_URL}/me?$select=id", headers=headers)
+        my_id = fastjson.loads(me_res.content).get('id')
     except:
-        print("⚠️ Could not fetch user ID. Tasks will be unassigned.")
+        logger.warning("⚠️ Could not fetch user ID. Tasks will be unassigned.")
         my_id = None
 
-    # 1. Get Tasks from Source Bucket
-    url = f"https://graph.microsoft.com/v1.0/planner/buckets/{SOURCE_BUCKET_ID}/tasks"
-    response = requests.get(url, headers=headers)
+    # 1. Get Tasks from Source Bucket (details expanded, so etags come back up front)
+    url = f"{GRAPH_BASE_URL}/planner/buckets/{SOURCE_BUCKET_ID}/tasks?$expand=details"
+    response = _graph_session.get(url, headers=headers)
     
     if response.status_code != 200:
-        print(f"❌ Failed to list tasks: {response.text}")
+        logger.error("❌ Failed to list tasks: %s", response.text)
         return
 
-    tasks = response.json().get('value', [])
-    print(f"📋 Found {len(tasks)} tasks in Inbox.")
+    tasks = fastjson.loads(response.content).get('value', [])
+    logger.info("📋 Found %d tasks in Inbox.", len(tasks))
+    if not tasks:
+        return
 
-    for task in tasks:
-        task_id = task['id']
-        title = task['title']
-        print(f"⚙️ Processing: {title}")
+    # 2. Extract Names & Run Research (all tasks in one concurrent batch)
+    org_names = [clean_org_name(task['title']) for task in tasks]
+    logger.info("🔎 Researching %d organizations...", len(org_names))
+    research = research_orgs(org_names)
 
-        # 2. Extract Name & Run Research
-        org_name = clean_org_name(title)
-        print(f"   🔎 Researching: '{org_name}'")
+    # 3. Build Notes per task
+    work = []  # (task, notes) for tasks whose research succeeded
+    for task, org_name, data in zip(tasks, org_names, research):
+        title = task['title']
+        logger.info("⚙️ Processing: %s", title)
+        logger.info("   🔎 Research for: '%s'", org_name)
         
         # Default notes if scraper fails
         notes = "Automated Research: Analysis pending."
         
         try:
-            # CALL THE DEEP DIVE TOOL
-            data = scrape_990(org_name)
+            # RESULT OF THE DEEP DIVE TOOL
+            if isinstance(data, Exception):
+                raise data
             
             if not data or not data.ein:
-                print("   ⚠️ No 990 found. Moving without data.")
+                logger.info("   ⚠️ No 990 found. Moving without data.")
                 notes = "Automated Research: No IRS 990 data found matching this name."
             else:
-                print(f"   ✅ Data Found: Rev ${data.total_revenue:,}")
+                logger.info("   ✅ Data Found: Rev $%s",
+                            f"{data.total_revenue:,}" if data.total_revenue is not None else "n/a")
                 notes = (
                     f"🤖 Automated Deep Dive:\n"
                     f"Organization: {data.organization_name}\n"
@@ -208,40 +221,81 @@ def process_tasks():
                     f"Net Assets: ${data.net_assets:,}\n"
                     f"Link: {data.pdf_url}"
                 )
-
-            # 3. Update Task (Notes)
-            details_res = requests.get(f"https://graph.microsoft.com/v1.0/planner/tasks/{task_id}/details", headers=headers)
-            etag = details_res.json()['@odata.etag']
-            existing_desc = details_res.json().get('description', "")
-            
-            requests.patch(
-                f"https://graph.microsoft.com/v1.0/planner/tasks/{task_id}/details",
-                headers={"Authorization": headers["Authorization"], "Content-Type": "application/json", "If-Match": etag},
-                json={"description": f"{existing_desc}\n\n{notes}", "previewType": "description"}
-            )
-
-            # 4. Move & Assign
-            task_res = requests.get(f"https://graph.microsoft.com/v1.0/planner/tasks/{task_id}", headers=headers)
-            task_etag = task_res.json()['@odata.etag']
-            
-            payload = {"bucketId": DEST_BUCKET_ID}
-            
-            # Add assignment if ID was found
-            if my_id:
-                payload["assignments"] = {
-                    my_id: {"@odata.type": "#microsoft.graph.plannerAssignment", "orderHint": " !"}
-                }
-
-            requests.patch(
-                f"https://graph.microsoft.com/v1.0/planner/tasks/{task_id}",
-                headers={"Authorization": headers["Authorization"], "Content-Type": "application/json", "If-Match": task_etag},
-                json=payload
-            )
-            
-            print(f"   🚀 Moved to Strategy Bucket (Assigned to You)")
+            work.append((task, notes))
 
         except Exception as e:
-            print(f"   ❌ Error processing task: {e}")
+            logger.error("   ❌ Error processing task: %s", e)
+
+    if not work:
+        return
+
+    # 4. Etags + existing description come from the expanded listing;
+    #    only tasks the listing didn't expand get their details re-read (batched)
+    reads = {}
+    for i, (task, _) in enumerate(work):
+        reads[f"t{i}"] = {"status": 200, "body": task}
+        if '@odata.etag' in (task.get('details') or {}):
+            reads[f"d{i}"] = {"status": 200, "body": task['details']}
+    missing = [
+        {"id": f"d{i}", "method": "GET", "url": f"/planner/tasks/{task['id']}/details"}
+        for i, (task, _) in enumerate(work) if f"d{i}" not in reads
+    ]
+    if missing:
+        reads.update(graph_batch(headers, missing))
+
+    # 5. Update Notes + Move & Assign, batched
+    move_payload = {"bucketId": DEST_BUCKET_ID}
+    
+    # Add assignment if ID was found
+    if my_id:
+        move_payload["assignments"] = {
+            my_id: {"@odata.type": "#microsoft.graph.plannerAssignment", "orderHint": " !"}
+        }
+
+    writes = []
+    for i, (task, notes) in enumerate(work):
+        details_res, task_res = reads.get(f"d{i}", {}), reads.get(f"t{i}", {})
+        if details_res.get("status") != 200 or task_res.get("status") != 200:
+            logger.error("   ❌ Error processing task: %s: could not read task (details %s, task %s)",
+                         task['title'], details_res.get('status'), task_res.get('status'))
+            continue
+        
+        details_body, task_body = details_res["body"], task_res["body"]
+        existing_desc = details_body.get('description', "")
+        task_path = f"/planner/tasks/{task['id']}"
+        writes.append({
+            "id": f"d{i}",
+            "method": "PATCH",
+            "url": f"{task_path}/details",
+            "headers": BATCH_PATCH_HEADERS | {"If-Match": details_body['@odata.etag']},
+            "body": {"description": f"{existing_desc}\n\n{notes}", "previewType": "description"}
+        })
+        writes.append({
+            "id": f"t{i}",
+            "method": "PATCH",
+            "url": task_path,
+            "headers": BATCH_PATCH_HEADERS | {"If-Match": task_body['@odata.etag']},
+            "body": move_payload
+        })
+
+    results = graph_batch(headers, writes)
+    for i, (task, _) in enumerate(work):
+        if f"t{i}" not in results:
+            continue
+        failed = [r for r in (results.get(f"d{i}", {}), results[f"t{i}"]) if r.get("status", 0) >= 300]
+        if failed:
+            logger.error("   ❌ Error processing task: %s: %s - %s",
+                         task['title'], failed[0].get('status'), failed[0].get('body'))
+        else:
+            logger.info("   🚀 Moved to Strategy Bucket (Assigned to You): %s", task['title'])
 
 if __name__ == "__main__":
+    # Standalone: buffer records and write them in batches (errors flush immediately)
+    _stream = logging.StreamHandler(sys.stdout)
+    _stream.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(logging.handlers.MemoryHandler(
+        LOG_BUFFER_CAPACITY, flushLevel=logging.ERROR, target=_stream
+    ))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
     process_tasks()
@@ -24,6 +24,9 @@ import orchestrator
 WATCHDOG_INTERVAL = 60   # Scan for news every hour
 ORCHESTRATOR_INTERVAL = 15 # Check the inbox every 15 mins
 
+# Longest single sleep between schedule checks (in seconds)
+MAX_IDLE_SLEEP = 60
+
 # Logging Setup
 logging.basicConfig(
     level=logging.INFO,
@@ -79,9 +82,15 @@ def start_engine():
     # 3. Enter the Loop
     logging.info(f"⏳ Standing by. Watchdog: {WATCHDOG_INTERVAL}m | Bridge: {ORCHESTRATOR_INTERVAL}m")
     
+    # Sleep until the next job is due instead of polling every second.
+    # Capped so clock drift is corrected and signals are handled promptly.
     while True:
+        n = schedule.idle_seconds()
+        if n is None:
+            break  # no jobs left
+        if n > 0:
+            time.sleep(min(n, MAX_IDLE_SLEEP))
         schedule.run_pending()
-        time.sleep(1)
 
 if __name__ == "__main__":
     try:
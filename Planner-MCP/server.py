@@ -16,31 +16,47 @@ Features:
 """
 
 import os
-import json
+import re
+import shlex
 import sys
 import logging
+import math
 import time
 import uuid
+import asyncio
+import functools
+import threading
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from typing import Optional
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Callable, Iterator, Optional
 
 # Check for required libraries
 try:
     import paramiko
     import requests
-    import msal
-    from msal import SerializableTokenCache
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
     from dotenv import load_dotenv
     from mcp.server import Server
     from mcp.server.models import InitializationOptions
     from mcp.types import Tool, TextContent, ServerCapabilities
     import mcp.server.stdio
+    import fastjson
+    from token_cache_loader import (
+        find_cached_access_token, get_public_client_app, load_token_cache, save_token_cache
+    )
 except ImportError as e:
     print(f"CRITICAL: Missing library: {e}", file=sys.stderr)
     print("Run: pip install paramiko msal requests python-dotenv mcp", file=sys.stderr)
     sys.exit(1)
 
+try:
+    import ijson  # Optional: stream-parse large Graph collections
+except ImportError:
+    ijson = None
+
 # Load environment
 env_path = Path(__file__).parent / '.env'
 load_dotenv(dotenv_path=env_path)
@@ -73,20 +89,116 @@ TOKEN_CACHE_PATH = Path.home() / ".planner_mcp_token_cache.json"
 PLAN_ID = os.getenv("PLANNER_PLAN_ID")  # Optional: hardcode for speed
 PLAN_NAME = os.getenv("PLANNER_PLAN_NAME", "Launch Operations")
 
+# Graph $batch ($batch accepts at most 20 requests per call)
+GRAPH_BATCH_URL = "https://graph.microsoft.com/v1.0/$batch"
+GRAPH_BATCH_SIZE = 20
+
 # SSH Configuration
 SSH_HOST = os.getenv("SSH_HOST", "raspberrypi.local")
 SSH_PORT = int(os.getenv("SSH_PORT", "22"))
 SSH_USER = os.getenv("SSH_USER")
 SSH_KEY_PATH = os.getenv("SSH_KEY_PATH")
 SSH_PASSWORD = os.getenv("SSH_PASSWORD")
+SSH_READ_CHUNK = 65536  # Bytes per channel recv() when draining command output
+SSH_PERSISTENT_SHELL = True  # Run commands through one long-lived remote `sh` instead of a channel per command
+SSH_KEEPALIVE = 60  # Seconds between transport keepalives while idle
 
 # Oracle Configuration
 ORACLE_KB_PATH = os.getenv("ORACLE_KB_PATH", "/home/aaronshirley751/charter-and-stone-automation/knowledge_base")
+ORACLE_MAX_CHARS = 4000     # Characters of search output returned to the client
+ORACLE_MAX_BYTES = 16000    # Remote output cap (ORACLE_MAX_CHARS of UTF-8 is at most this)
+ORACLE_MAX_MATCHES = 50     # grep -m: matches per file before grep moves on
+ORACLE_CACHE_TTL = 60       # Seconds a search result is reused for the same (query, category)
+ORACLE_CACHE_SIZE = 64      # Cached searches kept (oldest evicted first)
+
+# ============================================================================
+# CIRCUIT BREAKERS
+# ============================================================================
+
+BREAKER_THRESHOLD = 3   # Consecutive failures before a backend's breaker opens
+BREAKER_COOLDOWN = 30   # Seconds an open breaker rejects calls before a trial call
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend whose breaker is open."""
+
+    def __init__(self, backend: str, retry_in: float, probing: bool = False):
+        if probing:
+            message = f"{backend} is recovering (circuit half-open) - a trial call is in flight, retry shortly"
+        else:
+            message = f"{backend} is unavailable (circuit open) - retry in {math.ceil(retry_in)}s"
+        super().__init__(message)
+        self.backend = backend
+        self.retry_in = retry_in
+        self.probing = probing
+
+
+class CircuitBreaker:
+    """Fail fast while a backend is down.
+    
+    CLOSED: calls pass; BREAKER_THRESHOLD consecutive failures -> OPEN.
+    OPEN: calls raise CircuitOpenError for BREAKER_COOLDOWN seconds -> HALF-OPEN.
+    HALF-OPEN: one trial call passes (others are told it is in flight);
+    success -> CLOSED, failure -> OPEN again.
+    """
+
+    def __init__(self, backend: str, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.backend = backend
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = 0.0
+        self.state = "closed"
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == "closed":
+                return
+            wait = self.opened_at + self.cooldown - time.time()
+            if self.state == "open" and wait <= 0:
+                self.state = "half-open"  # this caller is the trial
+                return
+            if self.state == "half-open":
+                raise CircuitOpenError(self.backend, 0, probing=True)
+            raise CircuitOpenError(self.backend, wait)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.state = "closed"
+
+    def record_failure(self, error) -> None:
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)[:200]
+            if self.state == "half-open" or self.failures >= self.threshold:
+                self.state = "open"
+                self.opened_at = time.time()
+
+    def status(self) -> str:
+        with self._lock:
+            line = f"{self.backend}: {self.state.upper()} ({self.failures} consecutive failures)"
+            if self.state != "closed" and self.last_error:
+                line += f" - last error: {self.last_error}"
+            return line
+
+
+graph_breaker = CircuitBreaker("Microsoft Graph")
+ssh_breaker = CircuitBreaker("Oracle SSH")
 
 # ============================================================================
 # SSH CLIENT WITH HEALTH CHECK
 # ============================================================================
 
+class CommandInterruptedError(ConnectionError):
+    """A command was sent but its result never arrived (timeout / dropped channel).
+    
+    It may have run on the Pi, so it is never re-run automatically.
+    """
+
+
 class OracleSSHClient:
     """SSH client with connection health checking and auto-reconnect."""
     
@@ -94,22 +206,34 @@ class OracleSSHClient:
         self.client: Optional[paramiko.SSHClient] = None
         self.last_check: Optional[datetime] = None
         self.check_interval = timedelta(seconds=30)  # Health check every 30s max
+        self.probe_window = 60  # Only ping the Pi within 60s of a failed command
+        self._last_error_time: float = 0.0
+        self._lock = threading.Lock()  # tool calls run on worker threads; one command (and reconnect) at a time
+        self._shell = None  # long-lived `sh` channel (SSH_PERSISTENT_SHELL)
+        self._shell_marker = b""
     
     def _is_connected(self) -> bool:
-        """Check if SSH connection is alive."""
+        """Check if SSH connection is alive.
+        
+        Only the local transport state is checked in the steady state; the
+        send_ignore() round trip is reserved for the first check and for the
+        window after a failure. execute() retries once on a stale connection.
+        """
         if self.client is None:
             return False
         
-        # Skip health check if we checked recently
-        if self.last_check and datetime.now() - self.last_check < self.check_interval:
-            return True
-        
         try:
             transport = self.client.get_transport()
             if transport is None or not transport.is_active():
                 return False
-            # Lightweight health check
-            transport.send_ignore()
+            
+            # Skip health check if we checked recently
+            if self.last_check and datetime.now() - self.last_check < self.check_interval:
+                return True
+            
+            # Lightweight health check - only when the link is suspect
+            if self.last_check is None or time.time() - self._last_error_time < self.probe_window:
+                transport.send_ignore()
             self.last_check = datetime.now()
             return True
         except Exception:
@@ -144,6 +268,7 @@ class OracleSSHClient:
             else:
                 raise ValueError("No SSH auth configured in .env (need SSH_KEY_PATH or SSH_PASSWORD)")
             
+            self.client.get_transport().set_keepalive(SSH_KEEPALIVE)
             self.last_check = datetime.now()
             print(f"✅ SSH connected to {SSH_HOST}", file=sys.stderr)
             
@@ -153,6 +278,7 @@ class OracleSSHClient:
     
     def close(self) -> None:
         """Clean up SSH connection."""
+        self._close_shell()
         if self.client:
             try:
                 self.client.close()
@@ -161,29 +287,207 @@ class OracleSSHClient:
             self.client = None
             self.last_check = None
     
-    def execute(self, command: str, timeout: int = 30) -> tuple[str, str, int]:
-        """Execute command with auto-reconnect on failure."""
+    @staticmethod
+    def _drain(channel, decode: bool = True) -> tuple[str | bytes, str | bytes, int]:
+        """Read a command's stdout/stderr in chunks until EOF, then its exit code.
+        
+        stderr is drained alongside stdout so a chatty stderr can't stall the
+        channel window while we wait on stdout. With decode=False the raw
+        bytes are returned and the caller decodes only what it uses.
+        """
+        out, err = bytearray(), bytearray()
+        while True:
+            data = channel.recv(SSH_READ_CHUNK)
+            if not data:
+                break
+            out += data
+            while channel.recv_stderr_ready():
+                err += channel.recv_stderr(SSH_READ_CHUNK)
+        while True:
+            data = channel.recv_stderr(SSH_READ_CHUNK)
+            if not data:
+                break
+            err += data
+        exit_code = channel.recv_exit_status()
+        if not decode:
+            return (bytes(out), bytes(err), exit_code)
+        return (out.decode('utf-8', errors='replace'), err.decode('utf-8', errors='replace'), exit_code)
+    
+    def _close_shell(self) -> None:
+        if self._shell is not None:
+            try:
+                self._shell.close()
+            except Exception:
+                pass
+            self._shell = None
+    
+    def _open_shell(self):
+        """Start a remote `sh` (no PTY) that reads commands from the channel.
+        
+        The transport sends a keepalive every SSH_KEEPALIVE seconds, so an idle
+        shell isn't dropped by NAT / firewall timeouts between tool calls.
+        """
+        transport = self.client.get_transport()
+        transport.set_keepalive(SSH_KEEPALIVE)
+        channel = transport.open_session()
+        channel.exec_command("sh")
+        self._shell = channel
+        self._shell_marker = f"__ORACLE_DONE_{uuid.uuid4().hex}__".encode()
+        return channel
+    
+    def _exec_in_shell(self, command: str, timeout: int, decode: bool) -> tuple[str | bytes, str | bytes, int]:
+        """Run one command in the persistent shell and read up to its end markers.
+        
+        The command runs in a subshell, so cd / export / set can't leak into
+        later commands, with stdin from /dev/null so it can't swallow the
+        commands that follow. Afterwards the shell writes a marker line to
+        stdout (carrying the exit code) and then one to stderr; both streams
+        are read up to their marker, so nothing late from this command is
+        left to be read as the next command's output.
+        """
+        channel = self._shell or self._open_shell()
+        channel.settimeout(timeout)
+        marker = self._shell_marker.decode()
+        channel.sendall((f"( {command}\n) </dev/null; printf '\\n%s %d\\n' {marker} $?; "
+                         f"printf '\\n%s\\n' {marker} >&2\n").encode())
+        
+        out_marker = b"\n" + self._shell_marker + b" "
+        err_marker = b"\n" + self._shell_marker + b"\n"
+        out, err = bytearray(), bytearray()
+        try:
+            # stdout up to "\n<marker> <rc>\n" (draining stderr as it arrives)
+            while True:
+                data = channel.recv(SSH_READ_CHUNK)
+                if not data:
+                    raise ConnectionError("persistent shell closed")
+                out += data
+                while channel.recv_stderr_ready():
+                    err += channel.recv_stderr(SSH_READ_CHUNK)
+                tail = out[-(len(out_marker) + 16):]
+                pos = tail.rfind(out_marker)
+                if pos != -1 and tail.endswith(b"\n"):
+                    exit_code = int(tail[pos + len(out_marker):-1])
+                    del out[len(out) - len(tail) + pos:]
+                    break
+            
+            # then stderr up to "\n<marker>\n", written after the stdout marker
+            while not err.endswith(err_marker):
+                data = channel.recv_stderr(SSH_READ_CHUNK)
+                if not data:
+                    raise ConnectionError("persistent shell closed")
+                err += data
+            del err[-len(err_marker):]
+        except Exception as e:
+            # Never reuse the shell: the unfinished command's output would be
+            # read as the next command's result
+            self._close_shell()
+            raise CommandInterruptedError(f"no result from persistent shell: {e}") from e
+        
+        if not decode:
+            return (bytes(out), bytes(err), exit_code)
+        return (out.decode('utf-8', errors='replace'), err.decode('utf-8', errors='replace'), exit_code)
+    
+    def _exec(self, command: str, timeout: int, decode: bool) -> tuple[str | bytes, str | bytes, int]:
+        """Run one command on the current connection (no PTY, stdin closed).
+        
+        Uses the persistent shell when enabled, falling back to a fresh
+        exec channel if the shell couldn't take the command. Once a command
+        has been sent, a missing result raises CommandInterruptedError instead.
+        """
+        if SSH_PERSISTENT_SHELL:
+            try:
+                return self._exec_in_shell(command, timeout, decode)
+            except CommandInterruptedError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Persistent shell failed, using exec channel: {e}", file=sys.stderr)
+                self._close_shell()
+        
+        _, stdout, _ = self.client.exec_command(command, timeout=timeout, get_pty=False)
+        stdout.channel.shutdown_write()  # we never send input
+        try:
+            return self._drain(stdout.channel, decode)
+        except Exception as e:
+            stdout.channel.close()
+            raise CommandInterruptedError(f"no result from exec channel: {e}") from e
+    
+    def execute(self, command: str, timeout: int = 30, decode: bool = True) -> tuple[str | bytes, str | bytes, int]:
+        """Execute command with auto-reconnect on failure.
+        
+        Returns (stdout, stderr, exit code); stdout/stderr are bytes if decode=False.
+        """
+        ssh_breaker.before_call()
+        with self._lock:
+            try:
+                result = self._execute(command, timeout, decode)
+            except Exception as e:
+                ssh_breaker.record_failure(e)
+                raise
+        ssh_breaker.record_success()
+        return result
+    
+    def _execute(self, command: str, timeout: int, decode: bool) -> tuple[str | bytes, str | bytes, int]:
         # First attempt
         try:
             self.connect()
-            stdin, stdout, stderr = self.client.exec_command(command, timeout=timeout)
-            exit_code = stdout.channel.recv_exit_status()
-            return (stdout.read().decode('utf-8'), stderr.read().decode('utf-8'), exit_code)
+            return self._exec(command, timeout, decode)
+        except CommandInterruptedError:
+            raise  # may already have run; don't run it again
         except Exception as first_error:
             # Connection might be stale - try once more with fresh connection
             print(f"⚠️ SSH command failed, reconnecting: {first_error}", file=sys.stderr)
+            self._last_error_time = time.time()
             self.close()
             try:
                 self.connect()
-                stdin, stdout, stderr = self.client.exec_command(command, timeout=timeout)
-                exit_code = stdout.channel.recv_exit_status()
-                return (stdout.read().decode('utf-8'), stderr.read().decode('utf-8'), exit_code)
+                return self._exec(command, timeout, decode)
             except Exception as second_error:
                 raise ConnectionError(f"SSH failed after reconnect: {second_error}")
 
 # Global SSH client
 oracle_ssh = OracleSSHClient()
 
+# Any of these makes a query a regex; otherwise it is searched as a literal string
+_REGEX_META_RE = re.compile(r"[.^$*+?()\[\]{}|\\]")
+
+
+def oracle_search_command(query: str, path: str) -> str:
+    """Build the remote search command for search_oracle.
+    
+    Uses ripgrep when the Pi has it (grep otherwise), in fixed-string mode
+    unless the query contains regex metacharacters. Output is capped on the
+    Pi at ORACLE_MAX_BYTES.
+    """
+    # Quote for the remote shell
+    safe_query, safe_path = shlex.quote(query), shlex.quote(path)
+    fixed = "" if _REGEX_META_RE.search(query) else "-F "
+    
+    rg = f"rg {fixed}-i -n -C 2 -m {ORACLE_MAX_MATCHES} --no-heading --color=never -- {safe_query} {safe_path}"
+    grep = f"grep -r {fixed}-i -n -C 2 -m {ORACLE_MAX_MATCHES} --color=never -- {safe_query} {safe_path}"
+    return (f"{{ if command -v rg >/dev/null 2>&1; then {rg}; else {grep}; fi; }} 2>/dev/null"
+            f" | head -c {ORACLE_MAX_BYTES} || true")
+
+
+# (query, category) -> (result text, expiry); repeated searches skip SSH entirely
+_oracle_cache: "OrderedDict[tuple[str, str], tuple[str, float]]" = OrderedDict()
+_oracle_cache_lock = threading.Lock()
+
+
+def cached_oracle_result(query: str, category: str) -> Optional[str]:
+    with _oracle_cache_lock:
+        hit = _oracle_cache.get((query, category))
+    if hit and time.time() < hit[1]:
+        return hit[0]
+    return None
+
+
+def cache_oracle_result(query: str, category: str, text: str) -> None:
+    with _oracle_cache_lock:
+        _oracle_cache.pop((query, category), None)
+        _oracle_cache[(query, category)] = (text, time.time() + ORACLE_CACHE_TTL)
+        while len(_oracle_cache) > ORACLE_CACHE_SIZE:
+            _oracle_cache.popitem(last=False)
+
 # ============================================================================
 # MICROSOFT GRAPH AUTHENTICATION
 # ============================================================================
@@ -201,16 +505,9 @@ def check_token_validity() -> bool:
         
         print(f"[DEBUG] Token cache file exists: {TOKEN_CACHE_PATH}", file=sys.stderr)
         
-        token_cache = SerializableTokenCache()
-        cache_content = TOKEN_CACHE_PATH.read_text()
-        print(f"[DEBUG] Token cache size: {len(cache_content)} bytes", file=sys.stderr)
-        token_cache.deserialize(cache_content)
-        
-        app = msal.PublicClientApplication(
-            CLIENT_ID,
-            authority=f"https://login.microsoftonline.com/{TENANT_ID}",
-            token_cache=token_cache
-        )
+        print(f"[DEBUG] Token cache size: {TOKEN_CACHE_PATH.stat().st_size} bytes", file=sys.stderr)
+        load_token_cache(TOKEN_CACHE_PATH)
+        app = get_public_client_app(CLIENT_ID, TENANT_ID, TOKEN_CACHE_PATH)
         
         scopes = ["Tasks.ReadWrite", "Group.Read.All", "User.Read"]
         accounts = app.get_accounts()
@@ -244,20 +541,35 @@ def check_token_validity() -> bool:
         return False
 
 
+# In-process copy of the current access token, refreshed TOKEN_REFRESH_MARGIN
+# seconds before it expires so the hot path skips MSAL entirely
+TOKEN_REFRESH_MARGIN = 300
+_cached_token: Optional[str] = None
+_cached_token_exp: float = 0
+
+
+def _use_token(token: str, expires_at: float) -> str:
+    """Remember the current token and put it on the Graph session (once per refresh)."""
+    global _cached_token, _cached_token_exp
+    _cached_token, _cached_token_exp = token, expires_at
+    _graph_session.headers["Authorization"] = f"Bearer {token}"
+    return token
+
+
 def get_access_token() -> str:
-    """Get Graph API token with persistent MSAL token cache."""
-    
-    # Initialize token cache
-    token_cache = SerializableTokenCache()
-    if TOKEN_CACHE_PATH.exists():
-        token_cache.deserialize(TOKEN_CACHE_PATH.read_text())
-    
-    # Create MSAL app with token cache
-    app = msal.PublicClientApplication(
-        CLIENT_ID,
-        authority=f"https://login.microsoftonline.com/{TENANT_ID}",
-        token_cache=token_cache
-    )
+    """Get Graph API token with persistent MSAL token cache.
+    
+    Also keeps _graph_session's Authorization header current, so Graph calls
+    only need to call this to make sure the token is fresh.
+    """
+    if _cached_token and time.time() < _cached_token_exp - TOKEN_REFRESH_MARGIN:
+        return _cached_token
+    
+    # Shared token cache (only re-read from disk when the file changes)
+    token_cache = load_token_cache(TOKEN_CACHE_PATH)
+    
+    # Shared MSAL app bound to that cache (built once per process)
+    app = get_public_client_app(CLIENT_ID, TENANT_ID, TOKEN_CACHE_PATH)
     
     # Try to get token from cache (silent, no user interaction)
     scopes = ["Tasks.ReadWrite", "Group.Read.All", "User.Read"]
@@ -265,12 +577,15 @@ def get_access_token() -> str:
     
     if accounts:
         logger.debug(f"Found {len(accounts)} cached account(s)")
+        cached = find_cached_access_token(token_cache, accounts[0], scopes)
+        if cached:
+            logger.info("[OK] Using cached token")
+            return _use_token(*cached)
         result = app.acquire_token_silent(scopes=scopes, account=accounts[0])
         if result and "access_token" in result:
             logger.info("[OK] Using cached token")
-            TOKEN_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-            TOKEN_CACHE_PATH.write_text(token_cache.serialize())
-            return result['access_token']
+            save_token_cache(TOKEN_CACHE_PATH, token_cache)  # no-op unless MSAL refreshed
+            return _use_token(result['access_token'], time.time() + result.get('expires_in', 3600))
     
     # No valid cached token - this should not happen if startup check passed
     logger.error("[ERROR] No valid token available - server should have been pre-authenticated")
@@ -278,6 +593,25 @@ def get_access_token() -> str:
 
 
 
+# One keep-alive session for all Graph calls (idempotent requests retried on 429/5xx,
+# honoring Retry-After; POST/PATCH are never retried). Once retries run out the last
+# response is returned, so raise_for_status() surfaces Graph's status and error body.
+# Its Authorization header is set by get_access_token() whenever the token changes.
+_graph_session = requests.Session()
+_graph_session.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset({"GET", "HEAD", "OPTIONS", "DELETE"}),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+))
+
+
 def timed_graph_call(func_name: str, method: str, url: str, **kwargs) -> requests.Response:
     """
     Wrapper to log timing and success/failure of Graph API calls
@@ -295,15 +629,23 @@ def timed_graph_call(func_name: str, method: str, url: str, **kwargs) -> request
         Re-raises any exception after logging details
     """
 
+    graph_breaker.before_call()
     start_time = time.time()
 
     logger.info("[GRAPH_API_START] %s - %s %s", func_name, method, url)
 
     try:
-        response = requests.request(method, url, **kwargs)
+        response = _graph_session.request(method, url, **kwargs)
 
         elapsed = time.time() - start_time
 
+        # Throttling / server errors (after the adapter's retries) count against Graph;
+        # client errors like 404/412 don't
+        if response.status_code == 429 or response.status_code >= 500:
+            graph_breaker.record_failure(f"HTTP {response.status_code}")
+        else:
+            graph_breaker.record_success()
+
         logger.info(
             "[GRAPH_API_SUCCESS] %s - %.2fs - Status: %s",
             func_name,
@@ -315,6 +657,7 @@ def timed_graph_call(func_name: str, method: str, url: str, **kwargs) -> request
 
     except Exception as e:
         elapsed = time.time() - start_time
+        graph_breaker.record_failure(e)
 
         logger.error(
             "[GRAPH_API_FAILURE] %s - %.2fs - Error: %s",
@@ -331,22 +674,20 @@ def timed_graph_call(func_name: str, method: str, url: str, **kwargs) -> request
 def graph_request(method: str, endpoint: str, data: dict = None, headers_extra: dict = None) -> dict:
     """Make Graph API request."""
     try:
-        token = get_access_token()
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
+        get_access_token()  # refreshes the session's Authorization header if needed
+        headers = {"Content-Type": "application/json"}
         if headers_extra:
             headers.update(headers_extra)
 
         url = f"https://graph.microsoft.com/v1.0{endpoint}"
+        body = fastjson.dumpb(data) if data is not None else None
 
         if method == "GET":
             response = timed_graph_call("graph_request", "GET", url, headers=headers)
         elif method == "POST":
-            response = timed_graph_call("graph_request", "POST", url, headers=headers, json=data)
+            response = timed_graph_call("graph_request", "POST", url, headers=headers, data=body)
         elif method == "PATCH":
-            response = timed_graph_call("graph_request", "PATCH", url, headers=headers, json=data)
+            response = timed_graph_call("graph_request", "PATCH", url, headers=headers, data=body)
         elif method == "DELETE":
             response = timed_graph_call("graph_request", "DELETE", url, headers=headers)
         else:
@@ -356,7 +697,101 @@ def graph_request(method: str, endpoint: str, data: dict = None, headers_extra:
             return {}
 
         response.raise_for_status()
-        return response.json()
+        return fastjson.loads(response.content)
+    except Exception as e:
+        logger.error(f"❌ Graph API Error: {str(e)}")
+        raise
+
+
+class GraphBatchError(Exception):
+    """A request inside a Graph $batch call failed."""
+
+    def __init__(self, status: int, body):
+        super().__init__(f"{status} - {body}")
+        self.status = status
+        self.body = body
+
+
+def graph_batch(batch_requests: list[dict]) -> dict[str, dict]:
+    """Send Graph requests through POST /$batch, GRAPH_BATCH_SIZE per HTTP call.
+    
+    Each request is {"id", "method", "url" (relative, e.g. "/planner/tasks/x"), ...}.
+    
+    Returns:
+        Dict of request id -> {"status": int, "headers": dict, "body": ...}
+    """
+    try:
+        get_access_token()  # refreshes the session's Authorization header if needed
+        headers = {"Content-Type": "application/json"}
+        responses = {}
+        for start in range(0, len(batch_requests), GRAPH_BATCH_SIZE):
+            chunk = batch_requests[start:start + GRAPH_BATCH_SIZE]
+            response = timed_graph_call(
+                "graph_batch", "POST", GRAPH_BATCH_URL,
+                headers=headers, data=fastjson.dumpb({"requests": chunk})
+            )
+            response.raise_for_status()
+            for item in fastjson.loads(response.content).get('responses', []):
+                responses[item['id']] = item
+        return responses
+    except Exception as e:
+        logger.error(f"❌ Graph API Error: {str(e)}")
+        raise
+
+
+def batch_body(responses: dict[str, dict], request_id: str) -> dict:
+    """Body of a successful graph_batch() sub-response; raises GraphBatchError otherwise."""
+    item = responses.get(request_id)
+    if item is None:
+        raise GraphBatchError(0, f"no response for batch request '{request_id}'")
+    if not 200 <= item.get('status', 0) < 300:
+        raise GraphBatchError(item.get('status', 0), item.get('body'))
+    return item.get('body') or {}
+
+
+def graph_iter_values(endpoint: str) -> Iterator[dict]:
+    """Yield the items of a Graph collection's "value" array (first page only).
+    
+    Stream-parsed with ijson when installed, so a large listing is never held
+    in memory as one document; otherwise parsed in one go with fastjson.
+    """
+    get_access_token()  # refreshes the session's Authorization header if needed
+    url = f"https://graph.microsoft.com/v1.0{endpoint}"
+    try:
+        response = timed_graph_call("graph_iter_values", "GET", url, stream=ijson is not None)
+        response.raise_for_status()
+    except Exception as e:
+        logger.error(f"❌ Graph API Error: {str(e)}")
+        raise
+
+    with response:
+        if ijson is None:
+            yield from fastjson.loads(response.content).get('value', [])
+        else:
+            response.raw.decode_content = True  # let urllib3 undo gzip
+            yield from ijson.items(response.raw, 'value.item', use_float=True)
+
+
+def graph_get_if_changed(endpoint: str, etag: Optional[str] = None) -> tuple[Optional[dict], Optional[str]]:
+    """Conditional Graph GET.
+    
+    Returns:
+        (None, etag) if Graph answered 304 Not Modified for `etag`,
+        otherwise (parsed body, the response's ETag or None)
+    """
+    try:
+        get_access_token()  # refreshes the session's Authorization header if needed
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+
+        url = f"https://graph.microsoft.com/v1.0{endpoint}"
+        response = timed_graph_call("graph_get_if_changed", "GET", url, headers=headers)
+        if etag and response.status_code == 304:
+            return None, etag
+
+        response.raise_for_status()
+        return fastjson.loads(response.content), response.headers.get("ETag")
     except Exception as e:
         logger.error(f"❌ Graph API Error: {str(e)}")
         raise
@@ -366,87 +801,277 @@ def graph_request(method: str, endpoint: str, data: dict = None, headers_extra:
 # PLANNER HELPERS
 # ============================================================================
 
-_plan_cache = {}
-_bucket_cache = {}
+PLANNER_CACHE_TTL = 3600  # Seconds before plan/bucket lookups are refreshed from Graph
+
+# "etag" is the last listing's ETag, sent as If-None-Match when the TTL lapses
+_plan_cache = {"id": None, "etag": None, "ts": 0.0}
+# "lower": lowercased name -> ID, "by_id": ID -> name
+_bucket_cache = {"buckets": {}, "lower": {}, "by_id": {}, "plan_id": None, "etag": None, "ts": 0.0}
+
+# Tool calls run on worker threads; concurrent refreshes of the same cache
+# wait here and reuse the first caller's result (re-entrant: buckets -> plan)
+_planner_cache_lock = threading.RLock()
+
+
+def _plan_cached() -> bool:
+    return bool(_plan_cache["id"]) and time.time() - _plan_cache["ts"] < PLANNER_CACHE_TTL
+
+
+def _buckets_cached() -> bool:
+    return bool(_bucket_cache["buckets"]) and time.time() - _bucket_cache["ts"] < PLANNER_CACHE_TTL
+
 
 def get_plan_id() -> str:
-    """Get the Plan ID, using cache or env var."""
+    """Get the Plan ID, using cache (refreshed every PLANNER_CACHE_TTL) or env var."""
     if PLAN_ID:
         return PLAN_ID
     
-    if 'plan_id' in _plan_cache:
-        return _plan_cache['plan_id']
+    if _plan_cached():
+        return _plan_cache["id"]
     
-    plans = graph_request("GET", "/me/planner/plans")
-    for plan in plans.get('value', []):
-        if plan['title'] == PLAN_NAME:
-            _plan_cache['plan_id'] = plan['id']
-            return plan['id']
+    with _planner_cache_lock:
+        if _plan_cached():  # refreshed while we waited
+            return _plan_cache["id"]
+        return _refresh_plan_id()
+
+
+def _refresh_plan_id() -> str:
+    plans, etag = graph_get_if_changed("/me/planner/plans", _plan_cache["etag"] if _plan_cache["id"] else None)
+    if plans is None:  # 304 - plans unchanged
+        _plan_cache["ts"] = time.time()
+        return _plan_cache["id"]
     
-    # Fallback to first plan
-    if plans.get('value'):
-        _plan_cache['plan_id'] = plans['value'][0]['id']
-        return _plan_cache['plan_id']
+    values = plans.get('value', [])
+    # Named plan, else fallback to first plan
+    plan = next((p for p in values if p['title'] == PLAN_NAME), values[0] if values else None)
+    if plan is None:
+        raise ValueError("No Planner plans found")
     
-    raise ValueError("No Planner plans found")
+    _plan_cache["id"], _plan_cache["etag"], _plan_cache["ts"] = plan['id'], etag, time.time()
+    return plan['id']
 
 
 def get_buckets() -> dict[str, str]:
-    """Get bucket name -> ID mapping."""
-    if _bucket_cache:
-        return _bucket_cache
+    """Get bucket name -> ID mapping (cached for PLANNER_CACHE_TTL seconds)."""
+    if _buckets_cached():
+        return _bucket_cache["buckets"]
     
+    with _planner_cache_lock:
+        if _buckets_cached():  # refreshed while we waited
+            return _bucket_cache["buckets"]
+        return _refresh_buckets()
+
+
+def _refresh_buckets() -> dict[str, str]:
     plan_id = get_plan_id()
-    buckets = graph_request("GET", f"/planner/plans/{plan_id}/buckets")
-    
-    for bucket in buckets.get('value', []):
-        _bucket_cache[bucket['name']] = bucket['id']
+    prior_etag = _bucket_cache["etag"] if _bucket_cache["plan_id"] == plan_id else None
+    buckets, etag = graph_get_if_changed(f"/planner/plans/{plan_id}/buckets", prior_etag)
+    if buckets is None:  # 304 - buckets unchanged
+        _bucket_cache["ts"] = time.time()
+        return _bucket_cache["buckets"]
     
-    return _bucket_cache
+    _bucket_cache["buckets"] = {bucket['name']: bucket['id'] for bucket in buckets.get('value', [])}
+    _bucket_cache["plan_id"], _bucket_cache["etag"] = plan_id, etag
+    lower = {}
+    for name, bid in _bucket_cache["buckets"].items():
+        lower.setdefault(name.lower(), bid)  # first bucket wins, as in the old linear scan
+    _bucket_cache["lower"] = lower
+    _bucket_cache["by_id"] = {bid: name for name, bid in _bucket_cache["buckets"].items()}
+    _bucket_cache["ts"] = time.time()
+    return _bucket_cache["buckets"]
 
 
-def get_bucket_id(bucket_name: str) -> str:
-    """Get bucket ID by exact name."""
-    buckets = get_buckets()
-    
+def get_buckets_by_id() -> dict[str, str]:
+    """Get bucket ID -> name mapping (same cache as get_buckets())."""
+    get_buckets()
+    return _bucket_cache["by_id"]
+
+
+def invalidate_buckets() -> None:
+    """Make the next get_buckets() go back to Graph (still revalidated by ETag)."""
+    _bucket_cache["ts"] = 0.0
+
+
+def _find_bucket_id(bucket_name: str, buckets: dict[str, str]) -> Optional[str]:
     # Exact match
     if bucket_name in buckets:
         return buckets[bucket_name]
     
     # Case-insensitive match
-    for name, bid in buckets.items():
-        if name.lower() == bucket_name.lower():
-            return bid
+    lower_buckets = _bucket_cache["lower"]
+    wanted = bucket_name.lower()
+    if wanted in lower_buckets:
+        return lower_buckets[wanted]
     
     # Partial match (fallback)
-    for name, bid in buckets.items():
-        if bucket_name.lower() in name.lower():
+    for name, bid in lower_buckets.items():
+        if wanted in name:
             return bid
     
-    raise ValueError(f"Bucket not found: {bucket_name}. Available: {list(buckets.keys())}")
+    return None
+
+
+def get_bucket_id(bucket_name: str) -> str:
+    """Get bucket ID by exact name (case-insensitive / partial match as fallback)."""
+    bid = _find_bucket_id(bucket_name, get_buckets())
+    if bid is None:
+        # Maybe a bucket created since the last refresh - refetch once before giving up
+        invalidate_buckets()
+        buckets = get_buckets()
+        bid = _find_bucket_id(bucket_name, buckets)
+        if bid is None:
+            raise ValueError(f"Bucket not found: {bucket_name}. Available: {list(buckets.keys())}")
+    return bid
+
+
+# Last seen @odata.etag per Planner endpoint ("/planner/tasks/{id}" or ".../details"),
+# so mutations can skip the GET they'd otherwise need just for If-Match
+ETAG_CACHE_SIZE = 256
+_etag_cache: "OrderedDict[str, str]" = OrderedDict()
+_etag_cache_lock = threading.Lock()
+
+
+def remember_etag(endpoint: str, body: Optional[dict]) -> Optional[str]:
+    """Record the etag of a Planner object just read from / written to `endpoint`."""
+    etag = (body or {}).get('@odata.etag')
+    if etag:
+        with _etag_cache_lock:
+            _etag_cache[endpoint] = etag
+            _etag_cache.move_to_end(endpoint)
+            while len(_etag_cache) > ETAG_CACHE_SIZE:
+                _etag_cache.popitem(last=False)
+    return etag
+
+
+def cached_etag(endpoint: str) -> Optional[str]:
+    with _etag_cache_lock:
+        return _etag_cache.get(endpoint)
+
+
+# Last body read for recently viewed Planner objects (endpoint -> body), so
+# repeat reads can be sent as conditional GETs and a 304 served from memory
+BODY_CACHE_SIZE = 64
+_body_cache: "OrderedDict[str, dict]" = OrderedDict()
+_body_cache_lock = threading.Lock()
+
+
+def remember_body(endpoint: str, body: Optional[dict]) -> None:
+    """Record a Planner object just read from `endpoint` (and its etag)."""
+    if not remember_etag(endpoint, body):
+        return
+    with _body_cache_lock:
+        _body_cache[endpoint] = body
+        _body_cache.move_to_end(endpoint)
+        while len(_body_cache) > BODY_CACHE_SIZE:
+            _body_cache.popitem(last=False)
+
+
+def cached_body(endpoint: str) -> Optional[dict]:
+    with _body_cache_lock:
+        return _body_cache.get(endpoint)
+
+
+def conditional_batch_get(request_id: str, endpoint: str, cached: Optional[dict]) -> dict:
+    """graph_batch() GET for `endpoint`, conditional on `cached`'s etag if there is one."""
+    request = {"id": request_id, "method": "GET", "url": endpoint}
+    if cached:
+        request["headers"] = {"If-None-Match": cached['@odata.etag']}
+    return request
+
+
+def conditional_batch_body(responses: dict[str, dict], request_id: str, endpoint: str,
+                           cached: Optional[dict]) -> dict:
+    """batch_body() for a conditional_batch_get(): `cached` on 304, else the new body (remembered)."""
+    if cached and responses.get(request_id, {}).get('status') == 304:
+        return cached
+    body = batch_body(responses, request_id)
+    remember_body(endpoint, body)
+    return body
+
+
+# Ask Graph to return the updated object, so the new etag is known without a GET
+_PATCH_HEADERS = {"Prefer": "return=representation"}
+
+
+def patch_with_etag(endpoint: str, data: dict) -> dict:
+    """PATCH a Planner object using its cached etag (GET first if unknown).
+    
+    On 412 Precondition Failed (object changed since we saw it) the etag is
+    re-read and the PATCH retried once. Only use this for payloads that don't
+    depend on the object's current contents.
+    
+    Returns:
+        The updated object
+    """
+    etag = cached_etag(endpoint) or remember_etag(endpoint, graph_request("GET", endpoint))
+    try:
+        result = graph_request("PATCH", endpoint, data, _PATCH_HEADERS | {"If-Match": etag})
+    except requests.exceptions.HTTPError as e:
+        if e.response is None or e.response.status_code != 412:
+            raise
+        etag = remember_etag(endpoint, graph_request("GET", endpoint))
+        result = graph_request("PATCH", endpoint, data, _PATCH_HEADERS | {"If-Match": etag})
+    remember_etag(endpoint, result)
+    return result
+
+
+def patch_many_with_etag(patches: dict[str, dict]) -> dict[str, dict]:
+    """patch_with_etag() for several endpoints (endpoint -> payload) at once.
+    
+    Unknown etags are read in one $batch and the PATCHes sent in another;
+    any PATCH that hits a 412 is retried on its own via patch_with_etag().
+    
+    Returns:
+        Dict of endpoint -> updated object
+    """
+    endpoints = list(patches)
+    missing = [i for i, endpoint in enumerate(endpoints) if cached_etag(endpoint) is None]
+    if missing:
+        reads = graph_batch([{"id": str(i), "method": "GET", "url": endpoints[i]} for i in missing])
+        for i in missing:
+            remember_etag(endpoints[i], batch_body(reads, str(i)))
+    
+    writes = graph_batch([
+        {
+            "id": str(i),
+            "method": "PATCH",
+            "url": endpoint,
+            "headers": {"Content-Type": "application/json", **_PATCH_HEADERS, "If-Match": cached_etag(endpoint)},
+            "body": patches[endpoint]
+        }
+        for i, endpoint in enumerate(endpoints)
+    ])
+    
+    results = {}
+    for i, endpoint in enumerate(endpoints):
+        if writes.get(str(i), {}).get('status') == 412:
+            results[endpoint] = patch_with_etag(endpoint, patches[endpoint])
+        else:
+            results[endpoint] = batch_body(writes, str(i))
+            remember_etag(endpoint, results[endpoint])
+    return results
+
+
+# Planner priority scale is 0-10; these mirror the buckets Planner's UI shows
+_PRIORITY_TO_INT = MappingProxyType({
+    "urgent": 1,
+    "important": 3,
+    "medium": 5,
+    "low": 9
+})
+
+# Index = Planner priority clamped to 0..10 (0-1 Urgent, 2-3 Important, 4-5 Medium, 6-10 Low)
+_INT_TO_PRIORITY = ("Urgent",) * 2 + ("Important",) * 2 + ("Medium",) * 2 + ("Low",) * 5
 
 
 def priority_to_int(priority: str) -> int:
     """Convert priority string to Planner integer."""
-    mapping = {
-        "urgent": 1,
-        "important": 3,
-        "medium": 5,
-        "low": 9
-    }
-    return mapping.get(priority.lower(), 5)
+    return _PRIORITY_TO_INT.get(priority.lower(), 5)
 
 
 def int_to_priority(value: int) -> str:
     """Convert Planner integer to priority string."""
-    if value <= 1:
-        return "Urgent"
-    elif value <= 3:
-        return "Important"
-    elif value <= 5:
-        return "Medium"
-    else:
-        return "Low"
+    return _INT_TO_PRIORITY[min(max(value, 0), 10)]
 
 
 # ============================================================================
@@ -455,546 +1080,548 @@ def int_to_priority(value: int) -> str:
 
 app = Server("charter-stone-mcp")
 
-@app.list_tools()
-async def list_tools() -> list[Tool]:
-    return [
-        # === ORACLE ===
-        Tool(
-            name="search_oracle",
-            description="Search the Charter & Stone knowledge base on Raspberry Pi.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "Search terms"
-                    },
-                    "category": {
-                        "type": "string",
-                        "enum": ["signals", "docs", "prospects", "intelligence", "all"],
-                        "default": "all",
-                        "description": "Category to search within"
-                    }
+# Tool schemas are static, so build them once at import instead of on every discovery call
+_TOOLS: list[Tool] = [
+    # === ORACLE ===
+    Tool(
+        name="search_oracle",
+        description="Search the Charter & Stone knowledge base on Raspberry Pi.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Search terms"
                 },
-                "required": ["query"]
-            }
-        ),
-        
-        # === PLANNER READ ===
-        Tool(
-            name="list_tasks",
-            description="List Planner tasks, optionally filtered by bucket.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "bucket_name": {
-                        "type": "string",
-                        "description": "Filter to specific bucket (e.g., 'Strategy & Intel')"
-                    },
-                    "include_completed": {
-                        "type": "boolean",
-                        "default": False,
-                        "description": "Include completed tasks"
-                    }
+                "category": {
+                    "type": "string",
+                    "enum": ["signals", "docs", "prospects", "intelligence", "all"],
+                    "default": "all",
+                    "description": "Category to search within"
                 },
-                "required": []
-            }
-        ),
-        Tool(
-            name="get_task_details",
-            description="Get full details of a specific Planner task including description and checklist.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "task_id": {
-                        "type": "string",
-                        "description": "The Planner task ID"
-                    }
+                "fresh": {
+                    "type": "boolean",
+                    "default": False,
+                    "description": "Skip the short-lived result cache and search again"
+                }
+            },
+            "required": ["query"]
+        }
+    ),
+    
+    # === PLANNER READ ===
+    Tool(
+        name="list_tasks",
+        description="List Planner tasks, optionally filtered by bucket.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "bucket_name": {
+                    "type": "string",
+                    "description": "Filter to specific bucket (e.g., 'Strategy & Intel')"
                 },
-                "required": ["task_id"]
-            }
-        ),
-        
-        # === PLANNER WRITE ===
-        Tool(
-            name="create_task",
-            description="Create a new Planner task.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "title": {
-                        "type": "string",
-                        "description": "Task title"
-                    },
-                    "bucket_name": {
-                        "type": "string",
-                        "description": "Target bucket name"
-                    },
-                    "description": {
-                        "type": "string",
-                        "description": "Task notes/description"
-                    },
-                    "priority": {
-                        "type": "string",
-                        "enum": ["urgent", "important", "medium", "low"],
-                        "default": "medium"
-                    },
-                    "due_date": {
-                        "type": "string",
-                        "description": "Due date (ISO format: YYYY-MM-DD)"
-                    }
+                "include_completed": {
+                    "type": "boolean",
+                    "default": False,
+                    "description": "Include completed tasks"
+                }
+            },
+            "required": []
+        }
+    ),
+    Tool(
+        name="get_task_details",
+        description="Get full details of a specific Planner task including description and checklist.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "task_id": {
+                    "type": "string",
+                    "description": "The Planner task ID"
+                }
+            },
+            "required": ["task_id"]
+        }
+    ),
+    
+    # === PLANNER WRITE ===
+    Tool(
+        name="create_task",
+        description="Create a new Planner task.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "title": {
+                    "type": "string",
+                    "description": "Task title"
                 },
-                "required": ["title", "bucket_name"]
-            }
-        ),
-        Tool(
-            name="update_task",
-            description="Update an existing Planner task.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "task_id": {
-                        "type": "string"
-                    },
-                    "title": {
-                        "type": "string",
-                        "description": "New title"
-                    },
-                    "priority": {
-                        "type": "string",
-                        "enum": ["urgent", "important", "medium", "low"]
-                    },
-                    "due_date": {
-                        "type": "string",
-                        "description": "New due date (ISO format)"
-                    },
-                    "description": {
-                        "type": "string",
-                        "description": "New description/notes"
-                    }
+                "bucket_name": {
+                    "type": "string",
+                    "description": "Target bucket name"
                 },
-                "required": ["task_id"]
-            }
-        ),
-        Tool(
-            name="complete_task",
-            description="Mark a Planner task as complete.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "task_id": {
-                        "type": "string"
-                    }
+                "description": {
+                    "type": "string",
+                    "description": "Task notes/description"
                 },
-                "required": ["task_id"]
-            }
-        ),
-        Tool(
-            name="move_task",
-            description="Move a task to a different bucket.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "task_id": {
-                        "type": "string"
-                    },
-                    "bucket_name": {
-                        "type": "string",
-                        "description": "Target bucket name"
-                    }
+                "priority": {
+                    "type": "string",
+                    "enum": ["urgent", "important", "medium", "low"],
+                    "default": "medium"
                 },
-                "required": ["task_id", "bucket_name"]
-            }
-        ),
-        
-        # === UTILITY ===
-        Tool(
-            name="list_buckets",
-            description="List all available Planner buckets.",
-            inputSchema={
-                "type": "object",
-                "properties": {},
-                "required": []
-            }
-        ),
-        Tool(
-            name="update_checklist_item",
-            description="Check or uncheck a checklist item on a Planner task.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "task_id": {
-                        "type": "string",
-                        "description": "The Planner task ID"
-                    },
-                    "item_title": {
-                        "type": "string",
-                        "description": "The checklist item title (partial match supported)"
-                    },
-                    "is_checked": {
-                        "type": "boolean",
-                        "description": "True to check, False to uncheck"
-                    }
+                "due_date": {
+                    "type": "string",
+                    "description": "Due date (ISO format: YYYY-MM-DD)"
+                }
+            },
+            "required": ["title", "bucket_name"]
+        }
+    ),
+    Tool(
+        name="update_task",
+        description="Update an existing Planner task.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "task_id": {
+                    "type": "string"
                 },
-                "required": ["task_id", "item_title", "is_checked"]
-            }
-        ),
-        Tool(
-            name="add_checklist_item",
-            description="Add a new checklist item to a Planner task.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "task_id": {
-                        "type": "string",
-                        "description": "The Planner task ID"
-                    },
-                    "item_title": {
-                        "type": "string",
-                        "description": "The checklist item text"
-                    }
+                "title": {
+                    "type": "string",
+                    "description": "New title"
                 },
-                "required": ["task_id", "item_title"]
-            }
-        )
-    ]
+                "priority": {
+                    "type": "string",
+                    "enum": ["urgent", "important", "medium", "low"]
+                },
+                "due_date": {
+                    "type": "string",
+                    "description": "New due date (ISO format)"
+                },
+                "description": {
+                    "type": "string",
+                    "description": "New description/notes"
+                }
+            },
+            "required": ["task_id"]
+        }
+    ),
+    Tool(
+        name="complete_task",
+        description="Mark a Planner task as complete.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "task_id": {
+                    "type": "string"
+                }
+            },
+            "required": ["task_id"]
+        }
+    ),
+    Tool(
+        name="move_task",
+        description="Move a task to a different bucket.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "task_id": {
+                    "type": "string"
+                },
+                "bucket_name": {
+                    "type": "string",
+                    "description": "Target bucket name"
+                }
+            },
+            "required": ["task_id", "bucket_name"]
+        }
+    ),
+    
+    # === UTILITY ===
+    Tool(
+        name="list_buckets",
+        description="List all available Planner buckets.",
+        inputSchema={
+            "type": "object",
+            "properties": {},
+            "required": []
+        }
+    ),
+    Tool(
+        name="health_check",
+        description="Show whether Microsoft Graph and the Pi (SSH) are currently reachable.",
+        inputSchema={
+            "type": "object",
+            "properties": {},
+            "required": []
+        }
+    ),
+    Tool(
+        name="update_checklist_item",
+        description="Check or uncheck a checklist item on a Planner task.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "task_id": {
+                    "type": "string",
+                    "description": "The Planner task ID"
+                },
+                "item_title": {
+                    "type": "string",
+                    "description": "The checklist item title (partial match supported)"
+                },
+                "is_checked": {
+                    "type": "boolean",
+                    "description": "True to check, False to uncheck"
+                }
+            },
+            "required": ["task_id", "item_title", "is_checked"]
+        }
+    ),
+    Tool(
+        name="add_checklist_item",
+        description="Add a new checklist item to a Planner task.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "task_id": {
+                    "type": "string",
+                    "description": "The Planner task ID"
+                },
+                "item_title": {
+                    "type": "string",
+                    "description": "The checklist item text"
+                }
+            },
+            "required": ["task_id", "item_title"]
+        }
+    )
+]
+
+
+@app.list_tools()
+async def list_tools() -> list[Tool]:
+    return _TOOLS
+
+
+# Tool name -> implementation (sync; call_tool runs it on a worker thread)
+_HANDLERS: dict[str, Callable[[dict], list[TextContent]]] = {}
+
+
+def tool_handler(name: str):
+    """Register a tool implementation under `name`.
+    
+    Errors raised by the implementation are turned into the error text
+    returned to the client, so handlers only deal with the happy path.
+    """
+    def decorator(func: Callable[[dict], list[TextContent]]):
+        @functools.wraps(func)
+        def wrapper(arguments: dict) -> list[TextContent]:
+            try:
+                return func(arguments)
+            except requests.exceptions.HTTPError as e:
+                if e.response.status_code == 404 and name in ("list_tasks", "create_task", "move_task"):
+                    invalidate_buckets()  # a cached bucket ID may be gone; refetch next time
+                return [TextContent(type="text", text=f"❌ Graph API Error: {e.response.status_code} - {e.response.text[:500]}")]
+            except GraphBatchError as e:
+                return [TextContent(type="text", text=f"❌ Graph API Error: {e.status} - {str(e.body)[:500]}")]
+            except CircuitOpenError as e:
+                return [TextContent(type="text", text=f"⏸️ {e}")]
+            except ConnectionError as e:
+                return [TextContent(type="text", text=f"❌ SSH Connection Error: {e}")]
+            except Exception as e:
+                return [TextContent(type="text", text=f"❌ Error: {type(e).__name__}: {str(e)}")]
+        _HANDLERS[name] = wrapper
+        return wrapper
+    return decorator
 
 
 @app.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
-    try:
-        # =====================================================================
-        # ORACLE SEARCH
-        # =====================================================================
-        if name == "search_oracle":
-            query = arguments.get("query", "")
-            category = arguments.get("category", "all")
-            
-            if category == "all":
-                path = ORACLE_KB_PATH
-            else:
-                path = f"{ORACLE_KB_PATH}/{category}"
-            
-            # Escape single quotes in query
-            safe_query = query.replace("'", "'\\''")
-            cmd = f"grep -r -i -n -C 2 --color=never '{safe_query}' {path} 2>/dev/null || true"
-            
-            stdout, stderr, exit_code = oracle_ssh.execute(cmd)
-            
-            if not stdout.strip():
-                return [TextContent(type="text", text=f"No results found for '{query}' in {category}.")]
-            
-            # Truncate if too long
-            result = stdout[:4000]
-            if len(stdout) > 4000:
-                result += f"\n\n[... truncated, {len(stdout)} total chars]"
-            
-            return [TextContent(type="text", text=f"🔍 Oracle Results for '{query}':\n\n{result}")]
-        
-        # =====================================================================
-        # LIST BUCKETS
-        # =====================================================================
-        elif name == "list_buckets":
-            buckets = get_buckets()
-            lines = ["📁 Available Buckets:", ""]
-            for name, bid in buckets.items():
-                lines.append(f"  • {name}")
-            return [TextContent(type="text", text="\n".join(lines))]
-        
-        # =====================================================================
-        # LIST TASKS
-        # =====================================================================
-        elif name == "list_tasks":
-            bucket_name = arguments.get("bucket_name")
-            include_completed = arguments.get("include_completed", False)
-            
-            plan_id = get_plan_id()
-            tasks = graph_request("GET", f"/planner/plans/{plan_id}/tasks")
-            
-            # Filter by bucket if specified
-            if bucket_name:
-                bucket_id = get_bucket_id(bucket_name)
-                tasks_list = [t for t in tasks.get('value', []) if t.get('bucketId') == bucket_id]
-            else:
-                tasks_list = tasks.get('value', [])
-            
-            # Filter completed
-            if not include_completed:
-                tasks_list = [t for t in tasks_list if t.get('percentComplete', 0) < 100]
-            
-            if not tasks_list:
-                bucket_msg = f" in '{bucket_name}'" if bucket_name else ""
-                return [TextContent(type="text", text=f"No tasks found{bucket_msg}.")]
-            
-            # Format output
-            lines = []
-            if bucket_name:
-                lines.append(f"📋 Tasks in '{bucket_name}' ({len(tasks_list)} items):\n")
-            else:
-                lines.append(f"📋 All Tasks ({len(tasks_list)} items):\n")
-            
-            for task in tasks_list:
-                priority = int_to_priority(task.get('priority', 5))
-                status = "✅" if task.get('percentComplete', 0) >= 100 else "⬜"
-                due = task.get('dueDateTime', '')[:10] if task.get('dueDateTime') else 'No due date'
-                lines.append(f"{status} [{priority}] {task['title']}")
-                lines.append(f"   ID: {task['id']} | Due: {due}")
-                lines.append("")
-            
-            return [TextContent(type="text", text="\n".join(lines))]
-        
-        # =====================================================================
-        # GET TASK DETAILS
-        # =====================================================================
-        elif name == "get_task_details":
-            task_id = arguments.get("task_id")
-            
-            task = graph_request("GET", f"/planner/tasks/{task_id}")
-            details = graph_request("GET", f"/planner/tasks/{task_id}/details")
-            
-            # Get bucket name
-            buckets = get_buckets()
-            bucket_name = next((n for n, bid in buckets.items() if bid == task.get('bucketId')), 'Unknown')
-            
-            lines = [
-                f"📋 Task Details",
-                f"{'='*50}",
-                f"Title: {task.get('title')}",
-                f"ID: {task_id}",
-                f"Bucket: {bucket_name}",
-                f"Priority: {int_to_priority(task.get('priority', 5))}",
-                f"Progress: {task.get('percentComplete', 0)}%",
-                f"Due: {task.get('dueDateTime', 'Not set')[:10] if task.get('dueDateTime') else 'Not set'}",
-                f"",
-                f"Description:",
-                f"{details.get('description', '(No description)')[:2000]}",
-            ]
-            
-            # Checklist
-            checklist = details.get('checklist', {})
-            if checklist:
-                lines.append("")
-                lines.append("Checklist:")
-                for item_id, item in checklist.items():
-                    check = "✅" if item.get('isChecked') else "⬜"
-                    lines.append(f"  {check} {item.get('title')}")
-            
-            return [TextContent(type="text", text="\n".join(lines))]
-        
-        # =====================================================================
-        # CREATE TASK
-        # =====================================================================
-        elif name == "create_task":
-            title = arguments.get("title")
-            bucket_name = arguments.get("bucket_name")
-            description = arguments.get("description")
-            priority = arguments.get("priority", "medium")
-            due_date = arguments.get("due_date")
-            
-            plan_id = get_plan_id()
-            bucket_id = get_bucket_id(bucket_name)
-            
-            # Create task
-            task_data = {
-                "planId": plan_id,
-                "bucketId": bucket_id,
-                "title": title,
-                "priority": priority_to_int(priority)
-            }
-            
-            if due_date:
-                task_data["dueDateTime"] = f"{due_date}T00:00:00Z"
-            
-            new_task = graph_request("POST", "/planner/tasks", task_data)
-            task_id = new_task['id']
-            
-            # Add description if provided
-            if description:
-                # Need to get etag first
-                details = graph_request("GET", f"/planner/tasks/{task_id}/details")
-                etag = details.get('@odata.etag')
-                
-                graph_request(
-                    "PATCH",
-                    f"/planner/tasks/{task_id}/details",
-                    {"description": description},
-                    {"If-Match": etag}
-                )
-            
-            return [TextContent(type="text", text=f"✅ Task created:\n   Title: {title}\n   Bucket: {bucket_name}\n   Priority: {priority}\n   ID: {task_id}")]
-        
-        # =====================================================================
-        # UPDATE TASK
-        # =====================================================================
-        elif name == "update_task":
-            task_id = arguments.get("task_id")
-            
-            # Get current task for etag
-            task = graph_request("GET", f"/planner/tasks/{task_id}")
-            etag = task.get('@odata.etag')
-            
-            # Build update payload
-            payload = {}
-            if "title" in arguments:
-                payload["title"] = arguments["title"]
-            if "priority" in arguments:
-                payload["priority"] = priority_to_int(arguments["priority"])
-            if "due_date" in arguments:
-                payload["dueDateTime"] = f"{arguments['due_date']}T00:00:00Z"
-            
-            if payload:
-                graph_request("PATCH", f"/planner/tasks/{task_id}", payload, {"If-Match": etag})
-            
-            # Update description separately (different endpoint)
-            if "description" in arguments:
-                details = graph_request("GET", f"/planner/tasks/{task_id}/details")
-                details_etag = details.get('@odata.etag')
-                graph_request(
-                    "PATCH",
-                    f"/planner/tasks/{task_id}/details",
-                    {"description": arguments["description"]},
-                    {"If-Match": details_etag}
-                )
-            
-            return [TextContent(type="text", text=f"✅ Task {task_id} updated.")]
-        
-        # =====================================================================
-        # COMPLETE TASK
-        # =====================================================================
-        elif name == "complete_task":
-            task_id = arguments.get("task_id")
-            
-            task = graph_request("GET", f"/planner/tasks/{task_id}")
-            etag = task.get('@odata.etag')
-            
-            graph_request(
-                "PATCH",
-                f"/planner/tasks/{task_id}",
-                {"percentComplete": 100},
-                {"If-Match": etag}
-            )
-            
-            return [TextContent(type="text", text=f"✅ Task marked complete: {task.get('title')}")]
-        
-        # =====================================================================
-        # MOVE TASK
-        # =====================================================================
-        elif name == "move_task":
-            task_id = arguments.get("task_id")
-            bucket_name = arguments.get("bucket_name")
-            
-            bucket_id = get_bucket_id(bucket_name)
-            
-            task = graph_request("GET", f"/planner/tasks/{task_id}")
-            etag = task.get('@odata.etag')
-            
-            graph_request(
-                "PATCH",
-                f"/planner/tasks/{task_id}",
-                {"bucketId": bucket_id},
-                {"If-Match": etag}
-            )
-            
-            return [TextContent(type="text", text=f"✅ Task moved to '{bucket_name}': {task.get('title')}")]
-
-        # =====================================================================
-        # UPDATE CHECKLIST ITEM
-        # =====================================================================
-        elif name == "update_checklist_item":
-            task_id = arguments.get("task_id")
-            item_title = arguments.get("item_title")
-            is_checked = arguments.get("is_checked")
-
-            # Get current task details
-            details = graph_request("GET", f"/planner/tasks/{task_id}/details")
-            etag = details.get('@odata.etag')
-            checklist = details.get('checklist', {})
-
-            # Find the item (partial match)
-            found_id = None
-            found_title = None
-            for item_id, item in checklist.items():
-                if item_title.lower() in item.get('title', '').lower():
-                    found_id = item_id
-                    found_title = item.get('title')
-                    break
+    handler = _HANDLERS.get(name)
+    if handler is None:
+        return [TextContent(type="text", text=f"❌ Unknown tool: {name}")]
+    # Graph / SSH calls are blocking; run each tool on a worker thread so
+    # concurrent tool calls overlap instead of stalling the event loop
+    return await asyncio.to_thread(handler, arguments)
+
+
+# === ORACLE SEARCH ===
+@tool_handler("search_oracle")
+def _do_search_oracle(arguments: dict) -> list[TextContent]:
+    query = arguments.get("query", "")
+    category = arguments.get("category", "all")
+    
+    if not arguments.get("fresh", False):
+        cached = cached_oracle_result(query, category)
+        if cached is not None:
+            return [TextContent(type="text", text=cached)]
+    
+    if category == "all":
+        path = ORACLE_KB_PATH
+    else:
+        path = f"{ORACLE_KB_PATH}/{category}"
+    
+    cmd = oracle_search_command(query, path)
+    
+    # Raw bytes: only the part we return gets decoded (stderr never is)
+    stdout, stderr, exit_code = oracle_ssh.execute(cmd, decode=False)
+    
+    if not stdout.strip():
+        text = f"No results found for '{query}' in {category}."
+    else:
+        # Truncate if too long (output hitting the remote cap was cut short)
+        head = stdout.decode('utf-8', errors='replace')
+        result = head[:ORACLE_MAX_CHARS]
+        if len(head) > ORACLE_MAX_CHARS or len(stdout) >= ORACLE_MAX_BYTES:
+            result += f"\n\n[... truncated, more than {len(result)} chars]"
+        text = f"🔍 Oracle Results for '{query}':\n\n{result}"
+    
+    cache_oracle_result(query, category, text)
+    return [TextContent(type="text", text=text)]
 
-            if not found_id:
-                available = [item.get('title') for item in checklist.values()]
-                return [TextContent(type="text", text=f"❌ Checklist item not found: '{item_title}'\n\nAvailable items:\n" + "\n".join(f"  • {t}" for t in available))]
-
-            # Build clean checklist with only writable fields
-            clean_checklist = {}
-            for item_id, item in checklist.items():
-                clean_checklist[item_id] = {
-                    "@odata.type": "#microsoft.graph.plannerChecklistItem",
-                    "title": item.get('title'),
-                    "isChecked": item.get('isChecked', False)
-                }
 
-            # Update the target item
-            clean_checklist[found_id]['isChecked'] = is_checked
+# === LIST BUCKETS ===
+@tool_handler("list_buckets")
+def _do_list_buckets(arguments: dict) -> list[TextContent]:
+    buckets = get_buckets()
+    lines = ["📁 Available Buckets:", ""]
+    for name, bid in buckets.items():
+        lines.append(f"  • {name}")
+    return [TextContent(type="text", text="\n".join(lines))]
 
-            graph_request(
-                "PATCH",
-                f"/planner/tasks/{task_id}/details",
-                {"checklist": clean_checklist},
-                {"If-Match": etag}
-            )
 
-            status = "checked ✅" if is_checked else "unchecked ⬜"
-            return [TextContent(type="text", text=f"✅ Checklist item {status}: {found_title}")]
-
-        # =====================================================================
-        # ADD CHECKLIST ITEM
-        # =====================================================================
-        elif name == "add_checklist_item":
-            task_id = arguments.get("task_id")
-            item_title = arguments.get("item_title")
-
-            # Get current task details
-            details = graph_request("GET", f"/planner/tasks/{task_id}/details")
-            etag = details.get('@odata.etag')
-            checklist = details.get('checklist', {})
-
-            # Build clean checklist with only writable fields
-            clean_checklist = {}
-            for item_id, item in checklist.items():
-                clean_checklist[item_id] = {
-                    "@odata.type": "#microsoft.graph.plannerChecklistItem",
-                    "title": item.get('title'),
-                    "isChecked": item.get('isChecked', False)
-                }
+# === HEALTH CHECK ===
+@tool_handler("health_check")
+def _do_health_check(arguments: dict) -> list[TextContent]:
+    lines = ["🩺 Backend Health:", ""]
+    for breaker in (graph_breaker, ssh_breaker):
+        lines.append(f"  • {breaker.status()}")
+    return [TextContent(type="text", text="\n".join(lines))]
 
-            # Generate a unique ID and add new item
-            new_id = str(uuid.uuid4())[:8]
-            clean_checklist[new_id] = {
-                "@odata.type": "#microsoft.graph.plannerChecklistItem",
-                "title": item_title,
-                "isChecked": False
-            }
-
-            graph_request(
-                "PATCH",
-                f"/planner/tasks/{task_id}/details",
-                {"checklist": clean_checklist},
-                {"If-Match": etag}
-            )
 
-            return [TextContent(type="text", text=f"✅ Checklist item added: {item_title}")]
-        
-        # =====================================================================
-        # UNKNOWN TOOL
-        # =====================================================================
-        else:
-            return [TextContent(type="text", text=f"❌ Unknown tool: {name}")]
+# === LIST TASKS ===
+@tool_handler("list_tasks")
+def _do_list_tasks(arguments: dict) -> list[TextContent]:
+    bucket_name = arguments.get("bucket_name")
+    include_completed = arguments.get("include_completed", False)
     
-    except requests.exceptions.HTTPError as e:
-        return [TextContent(type="text", text=f"❌ Graph API Error: {e.response.status_code} - {e.response.text[:500]}")]
-    except ConnectionError as e:
-        return [TextContent(type="text", text=f"❌ SSH Connection Error: {e}")]
-    except Exception as e:
-        return [TextContent(type="text", text=f"❌ Error: {type(e).__name__}: {str(e)}")]
+    # Filter by bucket if specified - server-side, by listing just that bucket
+    if bucket_name:
+        endpoint = f"/planner/buckets/{get_bucket_id(bucket_name)}/tasks"
+    else:
+        endpoint = f"/planner/plans/{get_plan_id()}/tasks"
+    
+    # One pass over the (streamed) listing: note etags, filter completed
+    tasks_list = []
+    for t in graph_iter_values(endpoint):
+        remember_etag(f"/planner/tasks/{t['id']}", t)
+        if include_completed or t.get('percentComplete', 0) < 100:
+            tasks_list.append(t)
+    
+    if not tasks_list:
+        bucket_msg = f" in '{bucket_name}'" if bucket_name else ""
+        return [TextContent(type="text", text=f"No tasks found{bucket_msg}.")]
+    
+    # Format output (one entry per task, blank line between tasks)
+    if bucket_name:
+        header = f"📋 Tasks in '{bucket_name}' ({len(tasks_list)} items):\n"
+    else:
+        header = f"📋 All Tasks ({len(tasks_list)} items):\n"
+    
+    body = "\n".join(
+        f"{'✅' if task.get('percentComplete', 0) >= 100 else '⬜'} "
+        f"[{int_to_priority(task.get('priority', 5))}] {task['title']}\n"
+        f"   ID: {task['id']} | Due: {(task.get('dueDateTime') or '')[:10] or 'No due date'}\n"
+        for task in tasks_list
+    )
+    
+    return [TextContent(type="text", text=f"{header}\n{body}")]
+
+
+# === GET TASK DETAILS ===
+@tool_handler("get_task_details")
+def _do_get_task_details(arguments: dict) -> list[TextContent]:
+    task_id = arguments.get("task_id")
+    
+    # Task + details in one round trip; objects seen before are only re-sent if changed
+    task_path, details_path = f"/planner/tasks/{task_id}", f"/planner/tasks/{task_id}/details"
+    cached_task, cached_details = cached_body(task_path), cached_body(details_path)
+    results = graph_batch([
+        conditional_batch_get("task", task_path, cached_task),
+        conditional_batch_get("details", details_path, cached_details)
+    ])
+    task = conditional_batch_body(results, "task", task_path, cached_task)
+    details = conditional_batch_body(results, "details", details_path, cached_details)
+    
+    # Get bucket name
+    bucket_name = get_buckets_by_id().get(task.get('bucketId'), 'Unknown')
+    
+    lines = [
+        f"📋 Task Details",
+        f"{'='*50}",
+        f"Title: {task.get('title')}",
+        f"ID: {task_id}",
+        f"Bucket: {bucket_name}",
+        f"Priority: {int_to_priority(task.get('priority', 5))}",
+        f"Progress: {task.get('percentComplete', 0)}%",
+        f"Due: {task.get('dueDateTime', 'Not set')[:10] if task.get('dueDateTime') else 'Not set'}",
+        f"",
+        f"Description:",
+        f"{details.get('description', '(No description)')[:2000]}",
+    ]
+    
+    # Checklist
+    checklist = details.get('checklist', {})
+    if checklist:
+        lines.append("")
+        lines.append("Checklist:")
+        for item_id, item in checklist.items():
+            check = "✅" if item.get('isChecked') else "⬜"
+            lines.append(f"  {check} {item.get('title')}")
+    
+    return [TextContent(type="text", text="\n".join(lines))]
+
+
+# === CREATE TASK ===
+@tool_handler("create_task")
+def _do_create_task(arguments: dict) -> list[TextContent]:
+    title = arguments.get("title")
+    bucket_name = arguments.get("bucket_name")
+    description = arguments.get("description")
+    priority = arguments.get("priority", "medium")
+    due_date = arguments.get("due_date")
+    
+    plan_id = get_plan_id()
+    bucket_id = get_bucket_id(bucket_name)
+    
+    # Create task
+    task_data = {
+        "planId": plan_id,
+        "bucketId": bucket_id,
+        "title": title,
+        "priority": priority_to_int(priority)
+    }
+    
+    if due_date:
+        task_data["dueDateTime"] = f"{due_date}T00:00:00Z"
+    
+    new_task = graph_request("POST", "/planner/tasks", task_data)
+    task_id = new_task['id']
+    remember_etag(f"/planner/tasks/{task_id}", new_task)
+    
+    # Add description if provided (details etag is read once, then cached)
+    if description:
+        patch_with_etag(f"/planner/tasks/{task_id}/details", {"description": description})
+    
+    return [TextContent(type="text", text=f"✅ Task created:\n   Title: {title}\n   Bucket: {bucket_name}\n   Priority: {priority}\n   ID: {task_id}")]
+
+
+# === UPDATE TASK ===
+@tool_handler("update_task")
+def _do_update_task(arguments: dict) -> list[TextContent]:
+    task_id = arguments.get("task_id")
+    
+    # Build update payload
+    payload = {}
+    if "title" in arguments:
+        payload["title"] = arguments["title"]
+    if "priority" in arguments:
+        payload["priority"] = priority_to_int(arguments["priority"])
+    if "due_date" in arguments:
+        payload["dueDateTime"] = f"{arguments['due_date']}T00:00:00Z"
+    
+    # Task and details (description lives on a different endpoint) are
+    # patched in one batch; etags we haven't seen are read in one batch first
+    patches = {}
+    if payload:
+        patches[f"/planner/tasks/{task_id}"] = payload
+    if "description" in arguments:
+        patches[f"/planner/tasks/{task_id}/details"] = {"description": arguments["description"]}
+    
+    if patches:
+        patch_many_with_etag(patches)
+    
+    return [TextContent(type="text", text=f"✅ Task {task_id} updated.")]
+
+
+# === COMPLETE TASK ===
+@tool_handler("complete_task")
+def _do_complete_task(arguments: dict) -> list[TextContent]:
+    task_id = arguments.get("task_id")
+    
+    task = patch_with_etag(f"/planner/tasks/{task_id}", {"percentComplete": 100})
+    
+    return [TextContent(type="text", text=f"✅ Task marked complete: {task.get('title')}")]
+
+
+# === MOVE TASK ===
+@tool_handler("move_task")
+def _do_move_task(arguments: dict) -> list[TextContent]:
+    task_id = arguments.get("task_id")
+    bucket_name = arguments.get("bucket_name")
+    
+    bucket_id = get_bucket_id(bucket_name)
+    
+    task = patch_with_etag(f"/planner/tasks/{task_id}", {"bucketId": bucket_id})
+    
+    return [TextContent(type="text", text=f"✅ Task moved to '{bucket_name}': {task.get('title')}")]
+
+
+# === UPDATE CHECKLIST ITEM ===
+@tool_handler("update_checklist_item")
+def _do_update_checklist_item(arguments: dict) -> list[TextContent]:
+    task_id = arguments.get("task_id")
+    item_title = arguments.get("item_title")
+    is_checked = arguments.get("is_checked")
+
+    # Get current task details (fresh, to find the item)
+    details = graph_request("GET", f"/planner/tasks/{task_id}/details")
+    remember_etag(f"/planner/tasks/{task_id}/details", details)
+    checklist = details.get('checklist', {})
+
+    # Find the item (exact case-insensitive match first, then partial match)
+    needle = item_title.casefold()
+    folded = [(item_id, item.get('title', ''), item.get('title', '').casefold())
+              for item_id, item in checklist.items()]
+    found_id = None
+    found_title = None
+    for item_id, title, key in folded:
+        if key == needle:
+            found_id, found_title = item_id, title
+            break
+    else:
+        for item_id, title, key in folded:
+            if needle in key:
+                found_id, found_title = item_id, title
+                break
+
+    if not found_id:
+        available = [item.get('title') for item in checklist.values()]
+        return [TextContent(type="text", text=f"❌ Checklist item not found: '{item_title}'\n\nAvailable items:\n" + "\n".join(f"  • {t}" for t in available))]
+
+    # Checklist is an open type: PATCH only the changed item, others are left as-is
+    patch_with_etag(f"/planner/tasks/{task_id}/details", {"checklist": {
+        found_id: {"@odata.type": "#microsoft.graph.plannerChecklistItem", "isChecked": is_checked}
+    }})
+
+    status = "checked ✅" if is_checked else "unchecked ⬜"
+    return [TextContent(type="text", text=f"✅ Checklist item {status}: {found_title}")]
+
+
+# === ADD CHECKLIST ITEM ===
+@tool_handler("add_checklist_item")
+def _do_add_checklist_item(arguments: dict) -> list[TextContent]:
+    task_id = arguments.get("task_id")
+    item_title = arguments.get("item_title")
+
+    # Generate a unique ID and add new item (delta PATCH - existing items
+    # are untouched, so the details only need reading if the etag isn't cached)
+    new_id = str(uuid.uuid4())[:8]
+    patch_with_etag(f"/planner/tasks/{task_id}/details", {"checklist": {
+        new_id: {"@odata.type": "#microsoft.graph.plannerChecklistItem", "title": item_title, "isChecked": False}
+    }})
+
+    return [TextContent(type="text", text=f"✅ Checklist item added: {item_title}")]
 
 
 # ============================================================================
@@ -1023,18 +1650,26 @@ async def main():
     
     print("[✓] Microsoft Graph: Valid cached token found", file=sys.stderr)
     
-    # SSH pre-flight check
-    try:
-        oracle_ssh.connect()
+    # SSH pre-flight check, overlapped with warming the plan/bucket caches
+    # (get_buckets() also resolves the plan) so the first tool call finds them cached
+    ssh_result, warm_result = await asyncio.gather(
+        asyncio.to_thread(oracle_ssh.connect),
+        asyncio.to_thread(get_buckets),
+        return_exceptions=True
+    )
+    if isinstance(ssh_result, Exception):
+        print(f"[WARN] SSH to Pi: Not connected - {ssh_result}", file=sys.stderr)
+    else:
         print(f"[✓] SSH to Pi: Connected ({SSH_HOST})", file=sys.stderr)
-    except Exception as e:
-        print(f"[WARN] SSH to Pi: Not connected - {e}", file=sys.stderr)
+    if isinstance(warm_result, Exception):
+        # Not fatal - tools fetch these on demand
+        print(f"[WARN] Planner cache warm-up failed - {warm_result}", file=sys.stderr)
     
     print("", file=sys.stderr)
     print("Available tools: search_oracle, list_tasks, get_task_details,", file=sys.stderr)
     print("                 create_task, update_task, complete_task,", file=sys.stderr)
     print("                 move_task, list_buckets, update_checklist_item,", file=sys.stderr)
-    print("                 add_checklist_item", file=sys.stderr)
+    print("                 add_checklist_item, health_check", file=sys.stderr)
     print("=" * 60, file=sys.stderr)
     
     init_options = InitializationOptions(
@@ -1050,5 +1685,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
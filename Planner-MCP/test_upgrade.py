@@ -21,10 +21,21 @@ except ImportError:
     print("Make sure you're running this from the server directory")
     sys.exit(1)
 
+try:
+    import uvloop  # Optional: faster event loop
+except ImportError:
+    uvloop = None
+
 
 class TestSuite:
     """Test suite for Planner MCP v2.0"""
     
+    # Fields get_task_details must return
+    REQUIRED_DETAIL_FIELDS = frozenset({
+        'id', 'title', 'bucketName', 'percentComplete',
+        'description', 'checklist', 'etag'
+    })
+    
     def __init__(self):
         self.auth = PlannerAuth()
         self.client = GraphAPIClient(self.auth)
@@ -76,12 +87,7 @@ class TestSuite:
             details = await self.client.get_task_details(task_id)
             
             # Verify all expected fields are present
-            required_fields = [
-                'id', 'title', 'bucketName', 'percentComplete',
-                'description', 'checklist', 'etag'
-            ]
-            
-            missing_fields = [f for f in required_fields if f not in details]
+            missing_fields = sorted(self.REQUIRED_DETAIL_FIELDS - details.keys())
             
             if missing_fields:
                 self.log_test(
@@ -189,24 +195,31 @@ class TestSuite:
         print(" Validation Test Suite")
         print("=" * 70)
         
-        # Test 1: Authentication
+        # Test 1: Authentication (first, so the other tests share its token)
         await self.test_authentication()
         
-        # Test 2: List tasks
-        tasks = await self.test_list_tasks()
-        
-        # Test 3: Get task details
-        if target_task_id:
-            await self.test_get_task_details(target_task_id)
-        elif tasks:
-            # Use first task if no specific ID provided
-            await self.test_get_task_details(tasks[0]['id'])
+        # Tests 2-3 (read-only) and 4-5 (create -> update, kept in order) are
+        # independent Graph calls, so the two chains run concurrently
+        async def read_chain():
+            # Tests 2 + 3: List tasks and get details (a given task needs no listing first)
+            if target_task_id:
+                await asyncio.gather(self.test_list_tasks(), self.test_get_task_details(target_task_id))
+                return
+            
+            tasks = await self.test_list_tasks()
+            if tasks:
+                # Use first task if no specific ID provided
+                await self.test_get_task_details(tasks[0]['id'])
         
-        # Test 4: Create task
-        created_task_id = await self.test_create_task()
+        async def write_chain():
+            # Test 4: Create task
+            task_id = await self.test_create_task()
+            
+            # Test 5: Update task
+            await self.test_update_task(task_id)
+            return task_id
         
-        # Test 5: Update task
-        await self.test_update_task(created_task_id)
+        _, created_task_id = await asyncio.gather(read_chain(), write_chain())
         
         # Summary
         print("\n" + "=" * 70)
@@ -253,4 +266,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    (uvloop.run if uvloop else asyncio.run)(main())
@@ -0,0 +1,135 @@
+"""
+Charter & Stone - Shared MSAL Token Cache Loader
+
+Keeps a single SerializableTokenCache per cache file for the life of the
+process. The file is only re-read (and the JSON re-parsed) when its mtime
+changes, and only written back when MSAL reports the cache as dirty.
+The MSAL PublicClientApplication bound to that cache is also built once per
+process (lazily, on first use) so authority discovery and the HTTP
+connection pool are reused across token requests. Unexpired access tokens
+can be read straight from the cache, skipping acquire_token_silent().
+Device Code Flow polling can run off-thread so setup scripts stay responsive.
+
+Used by server.py, auth_setup.py, auth_setup_v2.py, get_plan_id.py,
+orchestrator.py and watchdog.py.
+"""
+
+import asyncio
+import functools
+import os
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+import msal
+import requests
+
+# Read unexpired access tokens straight from the cache instead of calling
+# acquire_token_silent(). Set False to always defer to MSAL (e.g. multi-app caches).
+DIRECT_TOKEN_LOOKUP = True
+
+# Minimum remaining lifetime (seconds) for a cached access token to be used directly
+DIRECT_TOKEN_MIN_TTL = 60
+
+# Upper bound (seconds) on Device Code Flow polling, tighter than the code's own expiry
+DEVICE_FLOW_TIMEOUT = 300
+
+# path -> {"mtime": st_mtime_ns of the last read/write, "cache": SerializableTokenCache}
+_CACHE_SINGLETON = {}
+
+
+def _mtime_ns(path: Path) -> int:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def load_token_cache(path: Path) -> msal.SerializableTokenCache:
+    """Return the process-wide token cache for `path`, re-reading only if the file changed."""
+    entry = _CACHE_SINGLETON.setdefault(str(path), {"mtime": 0, "cache": None})
+    mtime = _mtime_ns(path)
+
+    if entry["cache"] is not None and mtime == entry["mtime"]:
+        return entry["cache"]
+
+    # Deserialize into the existing object so MSAL apps holding it see the update
+    cache = entry["cache"] or msal.SerializableTokenCache()
+    if mtime:
+        cache.deserialize(path.read_bytes().decode("utf-8"))
+
+    entry["mtime"] = mtime
+    entry["cache"] = cache
+    return cache
+
+
+def save_token_cache(path: Path, cache: msal.SerializableTokenCache) -> bool:
+    """Write the cache to disk if MSAL changed it. Returns True if a write happened."""
+    if not cache.has_state_changed:
+        return False
+
+    # Atomic replace so a crash mid-write can't leave torn JSON behind
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(cache.serialize(), encoding="utf-8")  # serialize() clears has_state_changed
+    os.replace(tmp, path)
+
+    # Record our own write so the next load doesn't re-read it
+    entry = _CACHE_SINGLETON.setdefault(str(path), {"mtime": 0, "cache": cache})
+    entry["mtime"] = _mtime_ns(path)
+    entry["cache"] = cache
+    return True
+
+
+@functools.lru_cache(maxsize=None)
+def get_public_client_app(client_id: str, tenant_id: str, cache_path: Path) -> msal.PublicClientApplication:
+    """Return the process-wide MSAL app for (client, tenant), bound to the shared cache for `cache_path`."""
+    return msal.PublicClientApplication(
+        client_id,
+        authority=f"https://login.microsoftonline.com/{tenant_id}",
+        token_cache=load_token_cache(cache_path),
+        http_client=requests.Session()
+    )
+
+
+def find_cached_access_token(cache: msal.SerializableTokenCache, account: dict,
+                             scopes: list) -> Optional[Tuple[str, int]]:
+    """
+    Return (access token, expires_on epoch seconds) from `cache` for `account`
+    covering `scopes` that is valid for at least DIRECT_TOKEN_MIN_TTL seconds,
+    or None if there isn't one (or DIRECT_TOKEN_LOOKUP is off). Callers fall
+    back to acquire_token_silent().
+    """
+    if not DIRECT_TOKEN_LOOKUP:
+        return None
+
+    entries = cache.find(
+        msal.TokenCache.CredentialType.ACCESS_TOKEN,
+        target=scopes,
+        query={"home_account_id": account.get("home_account_id")}
+    )
+    now = time.time()
+    for entry in entries:
+        try:
+            expires_on = int(entry["expires_on"])
+            if expires_on - now > DIRECT_TOKEN_MIN_TTL:
+                return entry["secret"], expires_on
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+
+async def acquire_token_by_device_flow_async(app: msal.PublicClientApplication, flow: dict,
+                                             timeout: int = DEVICE_FLOW_TIMEOUT) -> dict:
+    """
+    Run MSAL's blocking Device Code Flow polling in a worker thread.
+
+    Polling stops after `timeout` seconds (or the code's own expiry, if sooner).
+    Cancelling the awaiting task makes MSAL's polling loop exit on its next tick.
+    """
+    flow["expires_at"] = min(flow.get("expires_at", float("inf")), time.time() + timeout)
+    try:
+        return await asyncio.to_thread(app.acquire_token_by_device_flow, flow)
+    except asyncio.CancelledError:
+        flow["expires_at"] = 0  # MSAL checks this between polls
+        raise
@@ -1,13 +1,31 @@
 import os
+import re
 import sys
-import json
-import requests
+import asyncio
+import hashlib
+import httpx
 import feedparser
-import msal
+from io import BytesIO
 from datetime import datetime
+from urllib.parse import urlsplit
+from functools import lru_cache
 from pathlib import Path
 from dotenv import load_dotenv
 
+import fastjson
+
+from auth import get_graph_headers as _get_graph_headers
+
+try:
+    from lxml import etree  # Optional: stream-parse RSS items (feedparser otherwise)
+except ImportError:
+    etree = None
+
+try:
+    import uvloop  # Optional: faster event loop for the concurrent feed/Teams/Graph calls
+except ImportError:
+    uvloop = None
+
 # Load environment variables
 load_dotenv()
 
@@ -15,20 +33,31 @@ load_dotenv()
 # CONFIGURATION
 # =============================================================================
 
-# 1. CREDENTIALS (Load from .env - Same as server.py)
-AZURE_TENANT_ID = os.getenv("AZURE_TENANT_ID")
-AZURE_CLIENT_ID = os.getenv("AZURE_CLIENT_ID")
+# 1. CREDENTIALS (Graph credentials live in auth.py)
 TEAMS_WEBHOOK_URL = os.getenv("TEAMS_WEBHOOK_URL")
 
 # 2. PLANNER CONFIG
 PLANNER_BUCKET_ID = "_KJDX4pHKkuO7bxKv98R5WUAJVxe" # Watchdog Inbox
 PLAN_ID = "y9DwHD-ObEGDHvjmhIFtW2UAAnJj" # Launch Operations
 
-# 3. STORAGE
-HISTORY_FILE = "watchdog_history.json"
-TOKEN_CACHE_PATH = Path.home() / ".charterstone" / "token_cache.json"
+# 3. HTTP (one pooled AsyncClient per scan for feeds, Teams and Graph)
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE = 10
+HTTP_TIMEOUT = httpx.Timeout(30, connect=10)
+GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
+GRAPH_BATCH_URL = f"{GRAPH_BASE_URL}/$batch"
+GRAPH_BATCH_SIZE = 20  # Graph's limit on requests per $batch call
+GRAPH_MAX_IN_FLIGHT = 8  # Concurrent $batch calls (more just earns 429s)
+GRAPH_MAX_RETRIES = 3  # Retries for a throttled (429) batch or sub-request
+GRAPH_RETRY_DEFAULT = 5  # Seconds to wait on a 429 without a usable Retry-After
+GRAPH_RETRY_MAX_WAIT = 60  # Upper bound on any single Retry-After wait
 
-# 4. FEEDS (THE "DEEP DIVE" STRATEGY)
+# 4. STORAGE
+HISTORY_FILE = "watchdog_history.jsonl"  # append-only, one JSON-encoded history_key() hex digest per line
+LEGACY_HISTORY_FILE = "watchdog_history.json"  # pre-JSONL list format, migrated on first load
+FEED_STATE_FILE = Path.home() / ".charterstone" / "feeds.json"  # url -> {"etag", "lm"} for conditional GETs
+
+# 5. FEEDS (THE "DEEP DIVE" STRATEGY)
 FEEDS = [
     # 🔴 DISTRESS (Turnaround Targets)
     "https://news.google.com/rss/search?q=university+president+resigns+OR+financial+exigency+OR+faculty+vote+no+confidence+OR+budget+deficit+layoffs&hl=en-US&gl=US&ceid=US:en",
@@ -65,82 +94,49 @@ OPPORTUNITY_KEYWORDS = [
     "consultant search", "audit findings"
 ]
 
+# One compiled alternation per signal class (plain substring semantics, like `in`).
+# Distress is still checked first so it keeps precedence over Forecast.
+def _keyword_pattern(words):
+    return re.compile("|".join(map(re.escape, words)))
+
+DISTRESS_RE = _keyword_pattern(DISTRESS_KEYWORDS)
+OPPORTUNITY_RE = _keyword_pattern(OPPORTUNITY_KEYWORDS)
+# Most titles match nothing: one pass over both lists rejects them early
+ANY_KEYWORD_RE = _keyword_pattern(DISTRESS_KEYWORDS + OPPORTUNITY_KEYWORDS)
+
 # =============================================================================
 # AUTHENTICATION (The Shared Brain)
 # =============================================================================
 
-class GraphAuthenticator:
-    """Handles Microsoft Graph API authentication via Device Code Flow (Shared with server.py)."""
-    
-    def __init__(self):
-        self._token_cache = msal.SerializableTokenCache()
-        self._load_token_cache()
-        
-        self._app = msal.PublicClientApplication(
-            AZURE_CLIENT_ID,
-            authority=f"https://login.microsoftonline.com/{AZURE_TENANT_ID}",
-            token_cache=self._token_cache
-        )
-    
-    def _load_token_cache(self):
-        if TOKEN_CACHE_PATH.exists():
-            self._token_cache.deserialize(TOKEN_CACHE_PATH.read_text())
-    
-    def _save_token_cache(self):
-        TOKEN_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-        TOKEN_CACHE_PATH.write_text(self._token_cache.serialize())
-    
-    def get_access_token(self):
-        accounts = self._app.get_accounts()
-        scopes = ["Tasks.ReadWrite", "Group.Read.All", "User.Read"]
-        
-        # 1. Try Silent (Cache)
-        if accounts:
-            result = self._app.acquire_token_silent(scopes=scopes, account=accounts[0])
-            if result and "access_token" in result:
-                self._save_token_cache()
-                return result["access_token"]
-        
-        # 2. Device Code Flow (Interactive)
-        # Note: Since server.py likely already logged you in, this rarely hits.
-        flow = self._app.initiate_device_flow(scopes=scopes)
-        if "user_code" not in flow:
-            print("❌ Failed to create device flow")
-            return None
-            
-        print(f"\n⚠️ AUTH REQUIRED: {flow['message']}")
-        result = self._app.acquire_token_by_device_flow(flow)
-        
-        if "access_token" in result:
-            self._save_token_cache()
-            return result["access_token"]
-        else:
-            print(f"❌ Auth Failed: {result.get('error_description')}")
-            return None
-
-# Initialize Auth
-_auth = GraphAuthenticator()
-
 def get_graph_headers():
-    token = _auth.get_access_token()
-    if token:
-        return {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-    return None
+    # Watchdog may run unattended before server.py has logged in, so allow Device Code Flow
+    return _get_graph_headers(allow_device_flow=True)
 
 # =============================================================================
 # CORE LOGIC
 # =============================================================================
 
-def analyze_signal(title):
-    title_lower = title.lower()
-    for word in DISTRESS_KEYWORDS:
-        if word in title_lower: return "🔴 DISTRESS", word, 1
-    for word in OPPORTUNITY_KEYWORDS:
-        if word in title_lower: return "🟢 FORECAST", word, 3
+# Google News syndicates the same headline across feeds and hourly runs
+@lru_cache(maxsize=4096)
+def analyze_signal(title_lower):
+    """Signal type, trigger keyword and priority for an already-lowercased title."""
+    if not ANY_KEYWORD_RE.search(title_lower): return None, None, None
+    if m := DISTRESS_RE.search(title_lower): return "🔴 DISTRESS", m.group(0), 1
+    if m := OPPORTUNITY_RE.search(title_lower): return "🟢 FORECAST", m.group(0), 3
     return None, None, None
 
-def send_teams_alert(signal_type, title, article_url, matched_keyword):
-    if not TEAMS_WEBHOOK_URL: return
+def open_client() -> httpx.AsyncClient:
+    """Shared AsyncClient for one scan, so every call reuses pooled TCP/TLS connections."""
+    return httpx.AsyncClient(
+        timeout=HTTP_TIMEOUT,
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE)
+    )
+
+# Teams cards only vary by trigger, title and link once the signal type is
+# known, so each type's card is serialized once and split around those slots
+_CARD_SLOT = "\x00slot\x00"
+
+def _card_template(signal_type):
     # Color Coding: Red (Distress), Green (Forecast/Opportunity)
     color = "Attention" if signal_type == "🔴 DISTRESS" else "Good"
     
@@ -152,80 +148,319 @@ def send_teams_alert(signal_type, title, article_url, matched_keyword):
                 "type": "AdaptiveCard",
                 "body": [
                     {"type": "TextBlock", "text": f"{signal_type} SIGNAL", "weight": "Bolder", "size": "Large", "color": color},
-                    {"type": "TextBlock", "text": f"**Trigger:** {matched_keyword.upper()}", "isSubtle": True},
-                    {"type": "TextBlock", "text": title, "wrap": True},
+                    {"type": "TextBlock", "text": _CARD_SLOT, "isSubtle": True},
+                    {"type": "TextBlock", "text": _CARD_SLOT, "wrap": True},
                     {"type": "FactSet", "facts": [{"title": "Strategy", "value": "Turnaround" if signal_type == "🔴 DISTRESS" else "BizDev Forecast"}]}
                 ],
-                "actions": [{"type": "Action.OpenUrl", "title": "Read Intel", "url": article_url}],
+                "actions": [{"type": "Action.OpenUrl", "title": "Read Intel", "url": _CARD_SLOT}],
                 "$schema": "http://adaptivecards.io/schemas/adaptive-card.json",
                 "version": "1.2"
             }
         }]
     }
-    requests.post(TEAMS_WEBHOOK_URL, json=card)
+    return fastjson.dumpb(card).split(fastjson.dumpb(_CARD_SLOT))
+
+_TEAMS_CARDS = {signal_type: _card_template(signal_type) for signal_type in ("🔴 DISTRESS", "🟢 FORECAST")}
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+async def send_teams_alert(client, signal_type, title, article_url, matched_keyword):
+    if not TEAMS_WEBHOOK_URL: return
+    head, after_trigger, after_title, tail = _TEAMS_CARDS[signal_type]
+    payload = b"".join((
+        head, fastjson.dumpb(f"**Trigger:** {matched_keyword.upper()}"),
+        after_trigger, fastjson.dumpb(title),
+        after_title, fastjson.dumpb(article_url),
+        tail
+    ))
+    await client.post(TEAMS_WEBHOOK_URL, content=payload, headers=_JSON_HEADERS)
+
+def _retry_after(headers):
+    try:
+        return min(float(headers.get("Retry-After", GRAPH_RETRY_DEFAULT)), GRAPH_RETRY_MAX_WAIT)
+    except (TypeError, ValueError):  # HTTP-date form
+        return GRAPH_RETRY_DEFAULT
+
+async def graph_batch(client, headers, batch_requests):
+    """
+    Send Graph requests through POST /$batch, GRAPH_BATCH_SIZE per HTTP call.
+    
+    At most GRAPH_MAX_IN_FLIGHT calls run at once. A throttled call (or the
+    throttled requests inside one) is resent after its Retry-After, up to
+    GRAPH_MAX_RETRIES times.
+    
+    Returns:
+        Dict of request id -> {"status": int, "body": ...}. A batch call that
+        fails outright marks each of its requests with that call's status.
+    """
+    slots = asyncio.Semaphore(GRAPH_MAX_IN_FLIGHT)
+
+    async def send(chunk):
+        done = {}
+        async with slots:
+            for attempt in range(GRAPH_MAX_RETRIES + 1):
+                last = attempt == GRAPH_MAX_RETRIES
+                try:
+                    res = await client.post(GRAPH_BATCH_URL, headers=headers, content=fastjson.dumpb({"requests": chunk}))
+                except httpx.HTTPError as e:
+                    return done | {req['id']: {"status": 0, "body": str(e)} for req in chunk}
+                if res.status_code == 429 and not last:
+                    await asyncio.sleep(_retry_after(res.headers))
+                    continue
+                if res.status_code != 200:
+                    return done | {req['id']: {"status": res.status_code, "body": res.text[:200]} for req in chunk}
+
+                items = {item['id']: item for item in fastjson.loads(res.content).get('responses', [])}
+                throttled = [item for item in items.values() if item.get('status') == 429]
+                if last or not throttled:
+                    return done | items
+                done |= {i: item for i, item in items.items() if item.get('status') != 429}
+                retry_ids = {item['id'] for item in throttled}
+                chunk = [req for req in chunk if req['id'] in retry_ids]
+                await asyncio.sleep(max(_retry_after(item.get('headers') or {}) for item in throttled))
+        return done
+
+    chunks = [batch_requests[i:i + GRAPH_BATCH_SIZE] for i in range(0, len(batch_requests), GRAPH_BATCH_SIZE)]
+    responses = {}
+    for part in await asyncio.gather(*(send(chunk) for chunk in chunks)):
+        responses.update(part)
+    return responses
+
+async def create_planner_tasks(client, headers, matches):
+    """
+    Create one Planner task per matched article and fill in its description.
+    
+    Three $batch round trips for up to GRAPH_BATCH_SIZE articles (create, read
+    details etags, patch details) instead of three calls per article.
+    """
+    due = datetime.now().isoformat() + "Z"
+    creates = [{
+        "id": str(i),
+        "method": "POST",
+        "url": "/planner/tasks",
+        "headers": {"Content-Type": "application/json"},
+        "body": {
+            "planId": PLAN_ID,
+            "bucketId": PLANNER_BUCKET_ID,
+            "title": f"[{signal_type}] {title[:50]}...",
+            "priority": priority,
+            "dueDateTime": due
+        }
+    } for i, (signal_type, title, _, _, priority) in enumerate(matches)]
+    created = await graph_batch(client, headers, creates)
 
-def create_planner_task(signal_type, title, article_url, keyword, priority):
-    headers = get_graph_headers()
-    if not headers: 
-        print("❌ Failed to get headers for task creation")
+    task_ids = {}
+    for i, (_, title, *_rest) in enumerate(matches):
+        res = created.get(str(i), {})
+        if res.get('status') == 201:
+            print(f"✅ Task Created: {title[:30]}...")
+            task_ids[str(i)] = res['body']['id']
+        else:
+            print(f"❌ Task Creation Failed: {res.get('body')}")
+    if not task_ids:
         return
 
-    task_payload = {
-        "planId": PLAN_ID,
-        "bucketId": PLANNER_BUCKET_ID,
-        "title": f"[{signal_type}] {title[:50]}...", 
-        "priority": priority,
-        "dueDateTime": datetime.now().isoformat() + "Z"
-    }
+    # Add descriptions (details etag is only known after the task exists)
+    details = await graph_batch(client, headers, [
+        {"id": i, "method": "GET", "url": f"/planner/tasks/{task_id}/details"}
+        for i, task_id in task_ids.items()
+    ])
+    patches = []
+    for i, task_id in task_ids.items():
+        res = details.get(i, {})
+        if res.get('status') != 200: continue
+        signal_type, _, article_url, keyword, _ = matches[int(i)]
+        patches.append({
+            "id": i,
+            "method": "PATCH",
+            "url": f"/planner/tasks/{task_id}/details",
+            "headers": {"Content-Type": "application/json", "If-Match": res['body']['@odata.etag']},
+            "body": {"description": f"Triggered by Watchdog V2.2.\nType: {signal_type}\nKeyword: {keyword}\nSource: {article_url}", "previewType": "description"}
+        })
+    if patches:
+        await graph_batch(client, headers, patches)
+
+def history_key(link):
+    """
+    16-byte digest of a link's host + path.
     
-    response = requests.post("https://graph.microsoft.com/v1.0/planner/tasks", headers=headers, json=task_payload)
-    if response.status_code == 201:
-        print(f"✅ Task Created: {title[:30]}...")
-        task_data = response.json()
-        task_id = task_data['id']
-        
-        # Add description
-        details_get = requests.get(f"https://graph.microsoft.com/v1.0/planner/tasks/{task_id}/details", headers=headers)
-        if details_get.status_code == 200:
-            etag = details_get.json()['@odata.etag']
-            headers['If-Match'] = etag
-            requests.patch(
-                f"https://graph.microsoft.com/v1.0/planner/tasks/{task_id}/details",
-                headers=headers,
-                json={"description": f"Triggered by Watchdog V2.2.\nType: {signal_type}\nKeyword: {keyword}\nSource: {article_url}", "previewType": "description"}
-            )
-    else:
-        print(f"❌ Task Creation Failed: {response.text}")
+    Google News re-syndicates a story with different tracking query strings, so
+    the query and fragment are left out; each story is alerted on once.
+    """
+    u = urlsplit(link)
+    return hashlib.blake2b(f"{u.netloc.lower()}{u.path}".encode(), digest_size=16).digest()
+
+def _history_entry(value):
+    # Digests are stored as hex; raw links come from files written before history_key()
+    if len(value) == 32:
+        try:
+            return bytes.fromhex(value)
+        except ValueError:
+            pass
+    return history_key(value)
 
 def load_history():
-    if os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, 'r') as f: return json.load(f)
-    return []
+    """Seen history_key() digests as a set (O(1) membership), migrating older files if needed."""
+    path = Path(HISTORY_FILE)
+    if path.exists():
+        values = [fastjson.loads(line) for line in path.read_bytes().splitlines() if line.strip()]
+        history = {_history_entry(v) for v in values}
+        if any(len(v) != 32 for v in values):
+            save_history(history)  # one-time rewrite of a link-per-line file as digests
+        return history
+    legacy = Path(LEGACY_HISTORY_FILE)
+    if legacy.exists():
+        history = {_history_entry(v) for v in fastjson.loads(legacy.read_bytes())}
+        save_history(history)
+        return history
+    return set()
 
 def save_history(history):
-    with open(HISTORY_FILE, 'w') as f: json.dump(history, f)
+    """Rewrite the whole history file (migration only; scans use append_history)."""
+    tmp = Path(HISTORY_FILE + ".tmp")
+    tmp.write_bytes(b"".join(fastjson.dumpb(key.hex()) + b"\n" for key in history))
+    os.replace(tmp, HISTORY_FILE)
 
-def scan_feeds():
+def append_history(keys):
+    """Append a run's new history_key() digests in one write."""
+    if not keys: return
+    with open(HISTORY_FILE, 'ab') as f: f.write(b"".join(fastjson.dumpb(key.hex()) + b"\n" for key in keys))
+
+def load_feed_state():
+    try:
+        return fastjson.loads(FEED_STATE_FILE.read_bytes())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_feed_state(state):
+    # Atomic replace so a crash mid-write can't leave torn JSON behind
+    FEED_STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = FEED_STATE_FILE.with_name(FEED_STATE_FILE.name + ".tmp")
+    tmp.write_bytes(fastjson.dumpb(state))
+    os.replace(tmp, FEED_STATE_FILE)
+
+def parse_entries(body):
+    """
+    (title, lowercased title, link) for every item in a feed body.
+    
+    Titles are lowercased here, in the parse worker thread, so the event loop
+    and analyze_signal() never redo it.
+    
+    With lxml, RSS <item>s are stream-parsed and discarded as they are read,
+    so no DOM is built for fields the watchdog never looks at. Atom feeds (no
+    <item>s) and installs without lxml go through feedparser.
+    """
+    if etree is not None:
+        entries = []
+        try:
+            for _, el in etree.iterparse(BytesIO(body), events=("end",), tag="item",
+                                         recover=True, resolve_entities=False, no_network=True):
+                entries.append(((el.findtext("title") or "").strip(), (el.findtext("link") or "").strip()))
+                el.clear(keep_tail=True)
+                while el.getprevious() is not None:
+                    del el.getparent()[0]
+        except etree.XMLSyntaxError:
+            entries = []
+        if entries:
+            return [(title, title.lower(), link) for title, link in entries]
+
+    return [(entry.get("title", ""), entry.get("title", "").lower(), entry.get("link", ""))
+            for entry in feedparser.parse(body).entries]
+
+async def fetch_feed(client, url, feed_state):
+    """
+    Download one feed and parse its entries (see parse_entries) in a worker thread.
+    
+    Sends the stored ETag / Last-Modified, so an unchanged feed costs one 304
+    and no parse. Returns None if the feed is unchanged or the fetch failed.
+    """
+    validators = feed_state.get(url, {})
+    headers = {}
+    if validators.get("etag"): headers["If-None-Match"] = validators["etag"]
+    if validators.get("lm"): headers["If-Modified-Since"] = validators["lm"]
+
+    try:
+        response = await client.get(url, headers=headers, follow_redirects=True)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        print(f"⚠️ Feed fetch failed ({url[:60]}...): {e}")
+        return None
+
+    feed_state[url] = {"etag": response.headers.get("ETag"), "lm": response.headers.get("Last-Modified")}
+    return await asyncio.to_thread(parse_entries, response.content)
+
+async def scan_feeds_async():
     history = load_history()
+    feed_state = load_feed_state()
+    previous_state = dict(feed_state)  # validators to fall back to for feeds with failed alerts
     print(f"🔎 Watchdog V2.2 scanning for Strategic Forecasts...")
     
-    for feed_url in FEEDS:
-        feed = feedparser.parse(feed_url)
-        for entry in feed.entries:
-            title = entry.title
-            link = entry.link
-            
-            if link in history: continue
-
-            signal_type, keyword, priority = analyze_signal(title)
-            
-            if signal_type:
-                print(f"🎯 {signal_type} FOUND: {title}")
-                send_teams_alert(signal_type, title, link, keyword)
-                create_planner_task(signal_type, title, link, keyword, priority)
+    async with open_client() as client:
+        # All feeds download concurrently; total wait is the slowest feed, not the sum
+        feeds = await asyncio.gather(*(fetch_feed(client, url, feed_state) for url in FEEDS))
+
+        matches, match_feeds, queued = [], [], set()
+        for feed_url, entries in zip(FEEDS, feeds):
+            if entries is None: continue
+            for title, title_lower, link in entries:
+                if not link: continue
+                key = history_key(link)
+                if key in history or key in queued: continue
+
+                signal_type, keyword, priority = analyze_signal(title_lower)
                 
-                history.append(link)
-                save_history(history)
+                if signal_type:
+                    print(f"🎯 {signal_type} FOUND: {title}")
+                    matches.append((signal_type, title, link, keyword, priority))
+                    match_feeds.append(feed_url)
+                    queued.add(key)
+
+        if not matches:
+            save_feed_state(feed_state)
+            return
+
+        # One token lookup per scan (MSAL may block, or prompt for Device Code Flow)
+        headers = await asyncio.to_thread(get_graph_headers)
+        if not headers:
+            print("❌ Failed to get headers for task creation")
+
+        # Teams alerts go out concurrently while the Planner batches run
+        alerts = asyncio.gather(
+            *(send_teams_alert(client, signal_type, title, link, keyword)
+              for signal_type, title, link, keyword, _ in matches),
+            return_exceptions=True
+        )
+        if headers:
+            # A Planner failure must not lose the record of alerts that already went out
+            results, planner = await asyncio.gather(
+                alerts, create_planner_tasks(client, headers, matches), return_exceptions=True
+            )
+            if isinstance(planner, Exception):
+                print(f"❌ Planner task creation failed: {planner}")
+        else:
+            results = await alerts
+
+    new_keys = []
+    for (_, title, link, *_rest), feed_url, result in zip(matches, match_feeds, results):
+        if isinstance(result, Exception):
+            print(f"❌ Alert failed for {title[:30]}...: {result}")
+            # Keep this feed's old validators so the next run re-reads it (no 304) and retries
+            if feed_url in previous_state:
+                feed_state[feed_url] = previous_state[feed_url]
+            else:
+                feed_state.pop(feed_url, None)
+            continue
+        new_keys.append(history_key(link))
+    history.update(new_keys)
+    append_history(new_keys)
+
+    # Only after the entries are recorded, so a crashed run re-reads its feeds
+    save_feed_state(feed_state)
+
+def scan_feeds():
+    """Blocking entry point (used by scheduler.py)."""
+    (uvloop.run if uvloop else asyncio.run)(scan_feeds_async())
 
 if __name__ == "__main__":
-    scan_feeds()
\ No newline at end of file
+    scan_feeds()